@@ -172,6 +172,7 @@ ipcMain.handle('start-engine', async (event) => {
     
     engineProcess = spawn(PYTHON_BIN, [
       script,
+      '--daemon',
       '--log', logPath,
       '--rules-dir', RULES_DIR,
     ], {
@@ -1,64 +1,21 @@
 from __future__ import annotations
 
 import argparse
-import os
+import signal
+import sys
 from pathlib import Path
-import yaml
 
-from core.rule_engine import RuleEngine
-
-
-DEFAULT_RULES_DIR = (
-    Path(__file__).resolve().parent.parent
-    / "frontend"
-    / "public"
-    / "rules"
-)
-
-
-def load_rules(profile: str | None = None, rules_dir: Path | None = None) -> list[dict]:
-    """Load YAML rule files from *rules_dir*.
-
-    Always load ``default.yaml`` if present. When ``profile`` is specified,
-    additional files from ``<rules_dir>/<profile>.yaml`` and ``<rules_dir>/<profile>/``
-    are loaded if they exist.
-    """
-
-    if rules_dir is None:
-        env_dir = os.getenv("APPFLOW_RULES_DIR")
-        rules_dir = Path(env_dir) if env_dir else DEFAULT_RULES_DIR
-
-    files: list[Path] = []
-
-    default_file = rules_dir / "default.yaml"
-    if default_file.exists():
-        files.append(default_file)
-
-    if profile:
-        profile_file = rules_dir / f"{profile}.yaml"
-        if profile_file.exists():
-            files.append(profile_file)
-        profile_dir = rules_dir / profile
-        if profile_dir.is_dir():
-            files.extend(sorted(profile_dir.glob("*.yaml")))
-
-    if not files:
-        return []
-
-    rules: list[dict] = []
-
-    for rule_file in files:
-        with open(rule_file, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
-            if isinstance(data, list):
-                rules.extend(data)
-    return rules
+from core.ipc import request
 
 
 def main(argv=None):
     parser = argparse.ArgumentParser(description="Run AppFlow rules")
     parser.add_argument("--list", action="store_true", help="List available rules")
-    parser.add_argument("--run", metavar="RULE", help="Run a specific rule by name")
+    parser.add_argument(
+        "--run",
+        metavar="RULE",
+        help="Run a specific rule by name, through the daemon when one is running",
+    )
     parser.add_argument("--log", metavar="FILE", help="Write execution log to FILE")
     parser.add_argument(
         "--profile",
@@ -85,7 +42,23 @@ def main(argv=None):
         "--once",
         "-1",
         action="store_true",
-        help="Check rules once and exit",
+        help="Check rules once and exit (app_exit triggers cannot fire)",
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Run each rule as an asyncio task so waits don't block other rules",
+    )
+    parser.add_argument(
+        "--no-watch",
+        action="store_true",
+        help="Don't reload rules when rule files change",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Also accept commands (run, reload, list, status, profile) on the local socket",
     )
     parser.add_argument(
         "--suggest",
@@ -94,6 +67,27 @@ def main(argv=None):
     )
     args = parser.parse_args(argv)
 
+    if args.run and not args.daemon:
+        # The daemon refuses the run when these differ from its own
+        options = {"profile": args.profile}
+        if args.rules_dir:
+            options["rules_dir"] = str(args.rules_dir.resolve())
+        if args.log:
+            options["log"] = str(Path(args.log).resolve())
+        try:
+            reply = request("run", rule=args.run, **options)
+        except (OSError, EOFError):
+            # No daemon, or one that does not answer: execute in this process
+            pass
+        else:
+            if not reply["ok"]:
+                sys.exit(reply["error"])
+            return
+
+    # Each command imports only what it uses: a command handled by the
+    # daemon never loads the engine, --list never loads it either
+    from core.rule_loader import RuleFileReloader, load_rules
+
     rules = load_rules(profile=args.profile, rules_dir=args.rules_dir)
 
     if args.list:
@@ -101,8 +95,15 @@ def main(argv=None):
             print(r.get("name", "Unnamed"))
         return
 
-    if args.run:
-        rules = [r for r in rules if r.get("name") == args.run]
+    from core.rule_engine import AsyncRuleEngine, Rule, RuleEngine
+    from utils.logger import configure_logging
+
+    if args.run and not args.daemon:
+        data = next((r for r in rules if r.get("name") == args.run), None)
+        if data is None:
+            sys.exit(f"Rule not found: {args.run}")
+        Rule(data).execute(log_path=args.log)
+        return
 
     if args.suggest:
         from utils.workflow_suggestions import generate_suggestions
@@ -116,13 +117,31 @@ def main(argv=None):
                 print(f"- {s}")
         return
 
-    engine = RuleEngine(
+    engine_class = AsyncRuleEngine if args.use_async else RuleEngine
+    engine = engine_class(
         rules,
         poll_interval=args.interval,
         log_path=args.log,
         run_once=args.once,
     )
-    engine.run()
+    if not (args.once or args.no_watch):
+        engine.reloader = RuleFileReloader(engine, args.profile, args.rules_dir)
+
+    # Log through the background writer; SIGTERM (how the UI stops the
+    # engine) exits normally so the queued lines are flushed.
+    configure_logging()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    daemon = None
+    if args.daemon:
+        from core.daemon import EngineDaemon
+
+        daemon = EngineDaemon(engine, args.profile, args.rules_dir)
+        daemon.start()
+    try:
+        engine.run()
+    finally:
+        if daemon is not None:
+            daemon.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,175 @@
+"""Engine scaling benchmark against a deterministic fake psutil.
+
+Run from ``main/``::
+
+    python benchmarks/bench_engine.py --output bench.json
+    python benchmarks/bench_engine.py --rules 10 1000 --compare bench.json
+
+For each rule count it measures cycle latency, trigger-evaluation
+throughput and memory, and can write the results as JSON so runs from
+different commits can be compared.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.rule_engine import RuleEngine  # noqa: E402
+from fake_backend import FakePsutil, install  # noqa: E402
+from utils.system import SensorHub  # noqa: E402
+
+DEFAULT_RULE_COUNTS = [10, 100, 1000, 10000, 100000]
+
+
+def make_rules(count: int, apps: int) -> list[dict]:
+    """Return ``count`` rules cycling through every trigger type."""
+    templates = [
+        lambda i: [{'app_start': f'app{i % apps}.exe'}],
+        lambda i: [{'app_exit': f'app{i % apps}.exe'}],
+        lambda i: [{'at_time': f'{i % 24:02d}:{i % 60:02d}'}],
+        lambda i: [{'cpu_above': 50 + i % 50}],
+        lambda i: [{'battery_below': i % 100}],
+        lambda i: [{'network_above': 1000 * (i % 10)}],
+    ]
+    return [
+        {
+            'name': f'Rule {i}',
+            'triggers': templates[i % len(templates)](i),
+            'actions': [],
+            'cooldown': 60,
+        }
+        for i in range(count)
+    ]
+
+
+def bench_rule_count(count: int, cycles: int, fake_options: dict) -> dict:
+    """Run ``cycles`` engine cycles over ``count`` rules and return metrics."""
+    fake = FakePsutil(**fake_options)
+    rules = make_rules(count, fake.apps)
+    with install(fake):
+        tracemalloc.start()
+        build_start = time.perf_counter()
+        # One sample per sensor per cycle, as with the default TTL and poll interval
+        engine = RuleEngine(rules, log_path=os.devnull, sensors=SensorHub(ttl=1.0))
+        build_time = time.perf_counter() - build_start
+        engine_memory = tracemalloc.get_traced_memory()[0]
+
+        latencies = []
+        evaluated = fired = 0
+        for _ in range(cycles):
+            fake.tick()
+            start = time.perf_counter()
+            context, candidates = engine._begin_cycle()
+            for rule in candidates:
+                if rule.check_triggers(context):
+                    rule.execute(log_path=engine.log_path, processes=context.processes)
+                    fired += 1
+            latencies.append(time.perf_counter() - start)
+            evaluated += len(candidates)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        "rules": count,
+        "cycles": cycles,
+        "build_ms": build_time * 1e3,
+        "cycle_ms_mean": statistics.fmean(latencies) * 1e3,
+        "cycle_ms_p50": latencies[len(latencies) // 2] * 1e3,
+        "cycle_ms_p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1e3,
+        "rules_evaluated_per_sec": evaluated / total if total else 0.0,
+        "rules_fired": fired,
+        "engine_memory_kb": engine_memory / 1024,
+        "peak_memory_kb": peak_memory / 1024,
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results: list[dict], baseline_path: Path) -> None:
+    """Print the change in mean cycle latency against a previous run."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {r["rules"]: r for r in json.load(f)["results"]}
+    print(f"\nvs {baseline_path}:")
+    for result in results:
+        old = baseline.get(result["rules"])
+        if old is None:
+            continue
+        change = (result["cycle_ms_mean"] / old["cycle_ms_mean"] - 1) * 100
+        print(f"  {result['rules']:>7} rules: {old['cycle_ms_mean']:9.3f} -> "
+              f"{result['cycle_ms_mean']:9.3f} ms/cycle ({change:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rules", type=int, nargs="+", default=DEFAULT_RULE_COUNTS)
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--processes", type=int, default=600)
+    parser.add_argument("--apps", type=int, default=50)
+    parser.add_argument("--churn", type=int, default=5, help="Processes replaced per cycle")
+    parser.add_argument("--cpu-mean", type=float, default=50.0)
+    parser.add_argument("--cpu-amplitude", type=float, default=40.0)
+    parser.add_argument("--network-kbps", type=float, default=5000.0)
+    parser.add_argument("--battery", type=float, default=60.0)
+    parser.add_argument("--output", type=Path, help="Write results as JSON to this file")
+    parser.add_argument("--compare", type=Path, help="Compare against a previous JSON result")
+    args = parser.parse_args(argv)
+
+    fake_options = {
+        "processes": args.processes,
+        "apps": args.apps,
+        "churn": args.churn,
+        "cpu_mean": args.cpu_mean,
+        "cpu_amplitude": args.cpu_amplitude,
+        "network_kbps": args.network_kbps,
+        "battery": args.battery,
+    }
+
+    results = []
+    print(f"{'rules':>7} {'build ms':>9} {'mean ms':>9} {'p95 ms':>9} {'rules/s':>12} {'peak KB':>10}")
+    for count in args.rules:
+        result = bench_rule_count(count, args.cycles, fake_options)
+        results.append(result)
+        print(f"{count:>7} {result['build_ms']:9.1f} {result['cycle_ms_mean']:9.3f} "
+              f"{result['cycle_ms_p95']:9.3f} {result['rules_evaluated_per_sec']:12.0f} "
+              f"{result['peak_memory_kb']:10.0f}")
+
+    if args.output:
+        report = {
+            "timestamp": datetime.now().isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "options": {"cycles": args.cycles, **fake_options},
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Startup benchmark: import cost of the CLI entry points.
+
+Run from ``main/``::
+
+    python benchmarks/bench_startup.py [--runs 7] [--rules-dir DIR] [--check]
+
+Every command starts a fresh interpreter under ``python -X importtime``
+with a warm rule cache, as a real invocation would. The report gives the
+median total import time per command and its slowest top-level imports.
+With ``--check`` the exit status is non-zero when a command exceeds
+``IMPORT_BUDGET_MS`` or imports one of ``HEAVY_MODULES``; the performance
+CI job runs it that way. The test suite checks ``HEAVY_MODULES`` and only
+a multiple of the budget, as shared test machines are noisy.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+MAIN_DIR = Path(__file__).resolve().parent.parent
+
+COMMANDS = {
+    "appflow --list": ["appflow.py", "--list"],
+    "enhanced --list": ["enhanced_appflow.py", "--list"],
+    "enhanced --validate": ["enhanced_appflow.py", "--validate"],
+}
+
+# Modules these commands must not import: each one is only needed by the
+# engine, the API, analytics or (with a warm rule cache) the YAML parser
+HEAVY_MODULES = (
+    "asyncio",
+    "concurrent.futures",
+    "http.server",
+    "multiprocessing",
+    "numpy",
+    "psutil",
+    "sqlite3",
+    "subprocess",
+    "webbrowser",
+    "yaml",
+)
+
+# Total import time allowed per command, generous enough for slow machines;
+# before lazy imports these commands took 110-175 ms
+IMPORT_BUDGET_MS = float(os.getenv("APPFLOW_IMPORT_BUDGET_MS", "100"))
+
+
+def import_profile(command: list[str], rules_dir: Path, env: dict | None = None) -> list[tuple[str, int, int]]:
+    """Run *command* under ``-X importtime`` and return (module, self us, cumulative us).
+
+    Only top-level imports keep their cumulative time meaningful, so nested
+    modules are reported with their indentation stripped but cumulative 0.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *command, "--rules-dir", str(rules_dir)],
+        cwd=MAIN_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    profile = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        top_level = not name.startswith("  ")
+        profile.append((name.strip(), int(self_us), int(cumulative_us) if top_level else 0))
+    return profile
+
+
+def total_ms(profile: list[tuple[str, int, int]]) -> float:
+    return sum(self_us for _, self_us, _ in profile) / 1000
+
+
+def run_command(command: list[str], rules_dir: Path, cache_dir: Path, runs: int) -> tuple[list[float], list]:
+    """Return the total import times of *runs* cold starts and the last profile."""
+    env = dict(os.environ, APPFLOW_CACHE_DIR=str(cache_dir))
+    # First run fills the rule cache
+    import_profile(command, rules_dir, env)
+    totals, profile = [], []
+    for _ in range(runs):
+        profile = import_profile(command, rules_dir, env)
+        totals.append(total_ms(profile))
+    return totals, profile
+
+
+def write_sample_rules(rules_dir: Path) -> None:
+    rules_dir.mkdir(parents=True, exist_ok=True)
+    (rules_dir / "default.yaml").write_text(
+        "- name: Sample\n"
+        "  triggers: [{app_start: code.exe}]\n"
+        "  actions: [{notify: ready}]\n",
+        encoding="utf-8",
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--rules-dir", type=Path, help="Rules to load (default: a small sample)")
+    parser.add_argument("--check", action="store_true",
+                        help="Exit with status 1 if a command is over budget or imports a heavy module")
+    args = parser.parse_args(argv)
+
+    failed = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rules_dir = args.rules_dir
+        if rules_dir is None:
+            rules_dir = Path(tmp) / "rules"
+            write_sample_rules(rules_dir)
+        for label, command in COMMANDS.items():
+            totals, profile = run_command(command, rules_dir, Path(tmp) / "cache", args.runs)
+            loaded = {name for name, _, _ in profile}
+            heavy = sorted(loaded.intersection(HEAVY_MODULES))
+            median = statistics.median(totals)
+            failed = failed or bool(heavy) or median > IMPORT_BUDGET_MS
+            print(f"{label:22s} median {median:6.1f} ms"
+                  f"  (budget {IMPORT_BUDGET_MS:.0f} ms)")
+            slowest = sorted((p for p in profile if p[2]), key=lambda p: p[2], reverse=True)[:5]
+            for name, _, cumulative_us in slowest:
+                print(f"    {cumulative_us / 1000:6.1f} ms  {name}")
+            if heavy:
+                print(f"    heavy imports: {', '.join(heavy)}")
+
+    if args.check and failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Microbenchmark: per-cycle trigger evaluation, interpreted vs compiled.
+
+Run from ``main/``::
+
+    python benchmarks/bench_trigger_plan.py [--rules 1000] [--cycles 200]
+
+Sensors are replaced with constants so only the evaluation overhead is
+measured, not psutil.
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import utils.system as system  # noqa: E402
+from core.rule_engine import Rule  # noqa: E402
+from core.triggers import CycleContext  # noqa: E402
+from utils.system import ProcessSnapshot  # noqa: E402
+
+
+def make_rules(count: int) -> list[dict]:
+    """Return ``count`` rules mixing every trigger type."""
+    templates = [
+        [{'at_time': '03:17'}],
+        [{'battery_below': 20}],
+        [{'network_above': 5000}],
+        [{'app_start': 'bench.exe'}, {'cpu_above': 99}],
+        [{'app_exit': 'bench.exe'}],
+    ]
+    return [
+        {'name': f'Rule {i}', 'triggers': templates[i % len(templates)], 'actions': []}
+        for i in range(count)
+    ]
+
+
+def interpreted_check(rule: Rule, context: CycleContext) -> bool:
+    """The pre-compilation trigger interpreter, kept for comparison."""
+    processes = context.processes
+    for trig in rule.triggers:
+        if 'app_start' in trig:
+            if not processes.is_running(trig['app_start']):
+                return False
+        elif 'app_exit' in trig:
+            if processes.is_running(trig['app_exit']):
+                return False
+        elif 'at_time' in trig:
+            if datetime.datetime.now().strftime('%H:%M') != trig['at_time']:
+                return False
+        elif 'battery_below' in trig:
+            level = system.get_battery_percent()
+            if level is None or level >= float(trig['battery_below']):
+                return False
+        elif 'cpu_above' in trig:
+            if system.get_cpu_percent(interval=0.1) <= float(trig['cpu_above']):
+                return False
+        elif 'network_above' in trig:
+            if system.get_network_bytes_per_sec() <= float(trig['network_above']) * 1024:
+                return False
+    return True
+
+
+def compiled_check(rule: Rule, context: CycleContext) -> bool:
+    return rule.check_triggers(context)
+
+
+def time_cycles(check, rules: list[Rule], cycles: int) -> float:
+    """Return the mean seconds per cycle for ``check`` over ``rules``."""
+    processes = ProcessSnapshot()
+    processes._table = {'bench.exe': [1]}
+    context = CycleContext(processes)
+    start = time.perf_counter()
+    for _ in range(cycles):
+        for rule in rules:
+            check(rule, context)
+    return (time.perf_counter() - start) / cycles
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rules", type=int, default=1000)
+    parser.add_argument("--cycles", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    rules = [Rule(r) for r in make_rules(args.rules)]
+    with mock.patch.multiple(
+        'utils.system',
+        get_battery_percent=lambda: 80.0,
+        get_cpu_percent=lambda interval=0.0: 10.0,
+        get_network_bytes_per_sec=lambda: 1024.0,
+    ), mock.patch.multiple(
+        system.sensors,
+        battery_percent=lambda: 80.0,
+        cpu_percent=lambda: 10.0,
+        network_bytes_per_sec=lambda: 1024.0,
+    ):
+        before = time_cycles(interpreted_check, rules, args.cycles)
+        after = time_cycles(compiled_check, rules, args.cycles)
+
+    print(f"{args.rules} rules, {args.cycles} cycles")
+    print(f"  interpreted: {before * 1e3:8.3f} ms/cycle")
+    print(f"  compiled:    {after * 1e3:8.3f} ms/cycle  ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
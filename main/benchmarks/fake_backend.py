@@ -0,0 +1,123 @@
+"""Deterministic stand-in for ``psutil`` used by the engine benchmarks.
+
+``install()`` swaps the ``psutil`` module seen by ``utils.system`` so the
+real ProcessSnapshot and SensorHub code runs against a synthetic machine:
+a process table of configurable size with a little churn per tick, CPU and
+network curves, and a fixed battery level. ``utils.system``'s monotonic
+clock also follows the ticks so sensor TTLs and network deltas are
+reproducible.
+"""
+from __future__ import annotations
+
+import math
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from unittest import mock
+
+import utils.system
+
+
+_Memory = namedtuple("svmem", "total percent")
+_Battery = namedtuple("sbattery", "percent secsleft power_plugged")
+_NetIO = namedtuple("snetio", "bytes_sent bytes_recv")
+
+
+class NoSuchProcess(Exception):
+    pass
+
+
+class AccessDenied(Exception):
+    pass
+
+
+class _FakeProcess:
+    __slots__ = ("info",)
+
+    def __init__(self, pid: int, name: str):
+        self.info = {"pid": pid, "name": name, "cpu_percent": 0.0, "memory_percent": 0.0}
+
+
+class _FakeHandle:
+    def terminate(self):
+        pass
+
+
+class _FakeClock:
+    """Stands in for the ``time`` module inside ``utils.system``."""
+
+    def __init__(self, fake: "FakePsutil"):
+        self._fake = fake
+
+    def monotonic(self):
+        return self._fake.tick_count * self._fake.tick_seconds
+
+    def time(self):
+        return time.time()
+
+
+class FakePsutil:
+    """The subset of the psutil API that ``utils.system`` uses."""
+
+    NoSuchProcess = NoSuchProcess
+    AccessDenied = AccessDenied
+
+    def __init__(self, processes: int = 600, apps: int = 50, churn: int = 5,
+                 cpu_mean: float = 50.0, cpu_amplitude: float = 40.0,
+                 network_kbps: float = 5000.0, battery: float | None = 60.0,
+                 tick_seconds: float = 2.0):
+        self.apps = apps
+        self.churn = churn
+        self.cpu_mean = cpu_mean
+        self.cpu_amplitude = cpu_amplitude
+        self.network_kbps = network_kbps
+        self.battery = battery
+        self.tick_seconds = tick_seconds
+        self.tick_count = 0
+        self._next_pid = 1
+        self._bytes = 0
+        self.table = [self._spawn(i) for i in range(processes)]
+
+    def _spawn(self, index: int) -> _FakeProcess:
+        pid = self._next_pid
+        self._next_pid += 1
+        return _FakeProcess(pid, f"app{index % self.apps}.exe")
+
+    def tick(self) -> None:
+        """Advance the synthetic clock: replace a few processes, move the curves."""
+        self.tick_count += 1
+        for i in range(self.churn):
+            slot = (self.tick_count * self.churn + i) % len(self.table)
+            self.table[slot] = self._spawn(self.tick_count + i)
+        # Throughput follows a slow sine around the configured rate
+        rate = self.network_kbps * (1 + 0.5 * math.sin(self.tick_count / 7))
+        self._bytes += int(rate * 1024 * self.tick_seconds)
+
+    # psutil API -------------------------------------------------------
+    def process_iter(self, attrs=None):
+        return iter(self.table)
+
+    def Process(self, pid):
+        return _FakeHandle()
+
+    def cpu_percent(self, interval=None):
+        return self.cpu_mean + self.cpu_amplitude * math.sin(self.tick_count / 10)
+
+    def virtual_memory(self):
+        return _Memory(16 * 1024 ** 3, 42.0)
+
+    def sensors_battery(self):
+        if self.battery is None:
+            return None
+        return _Battery(self.battery, 3600, False)
+
+    def net_io_counters(self):
+        return _NetIO(self._bytes // 2, self._bytes - self._bytes // 2)
+
+
+@contextmanager
+def install(fake: FakePsutil):
+    """Route ``utils.system`` through *fake* for the duration of the block."""
+    with mock.patch.object(utils.system, "psutil", fake), \
+            mock.patch.object(utils.system, "time", _FakeClock(fake)):
+        yield fake
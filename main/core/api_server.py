@@ -0,0 +1,371 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import TYPE_CHECKING, Dict
+from urllib.parse import urlsplit
+
+from utils.event_bus import EventBus, Subscription, bus as default_bus
+
+if TYPE_CHECKING:
+    from enhanced_appflow import AnalyticsManager, EnhancedRuleEngine
+
+
+# Seconds a serialized response stays fresh; 0 rebuilds it on every request
+API_CACHE_TTL = {
+    "/api/status": 2.0,
+    "/api/analytics": 30.0,
+    "/api/rules": 300.0,
+}
+
+
+class CachedResponse:
+    """A serialized response body with its ETag"""
+    
+    __slots__ = ("body", "etag", "version", "expires")
+    
+    def __init__(self, body: bytes, version, expires: float):
+        self.body = body
+        self.etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        self.version = version
+        self.expires = expires
+
+
+class ResponseCache:
+    """Pre-serialized API responses with a per-path TTL
+    
+    An entry is reused until its TTL runs out or the data version it was
+    built from changes. Concurrent misses on one path build the response
+    once.
+    """
+    
+    def __init__(self, ttl: Dict[str, float] = None):
+        self.ttl = dict(API_CACHE_TTL, **(ttl or {}))
+        self._entries: Dict[str, CachedResponse] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        
+    def get(self, path: str, version, build) -> CachedResponse:
+        """Return the response for *path*, calling *build* on a miss"""
+        entry = self._entries.get(path)
+        if entry is not None and entry.version == version and entry.expires > time.monotonic():
+            return entry
+        with self._locks_lock:
+            lock = self._locks.setdefault(path, threading.Lock())
+        with lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.version == version and entry.expires > time.monotonic():
+                return entry
+            body = json.dumps(build()).encode()
+            entry = CachedResponse(body, version, time.monotonic() + self.ttl.get(path, 0))
+            self._entries[path] = entry
+        return entry
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Whether an If-None-Match header value covers *etag*"""
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _sse(kind: str, data) -> bytes:
+    """Encode one Server-Sent Events message"""
+    return f"event: {kind}\ndata: {json.dumps(data, default=str)}\n\n".encode()
+
+
+class APIRequestHandler(BaseHTTPRequestHandler):
+    """Serves the JSON API over HTTP/1.1 keep-alive connections"""
+    
+    protocol_version = "HTTP/1.1"
+    
+    routes = {
+        "/api/status": "_status",
+        "/api/analytics": "_analytics",
+        "/api/rules": "_rules",
+    }
+    
+    def setup(self):
+        # Bounds both a slow request and an idle keep-alive connection
+        self.timeout = self.server.request_timeout
+        super().setup()
+        
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/api/events":
+            self._stream_events()
+            return
+        route = self.routes.get(path)
+        if route is None:
+            self._send_json_response(404, {"error": "Not found"})
+            return
+        server = self.server
+        # Recorded executions and rule reloads make every cached body stale
+        version = (server.analytics.version, server.engine.rules_version)
+        try:
+            response = server.cache.get(path, version, getattr(self, route))
+        except Exception as e:
+            self._send_json_response(500, {"error": str(e)})
+            return
+        if _etag_matches(self.headers.get("If-None-Match", ""), response.etag):
+            self.send_response(304)
+            self.send_header('ETag', response.etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            return
+        self._send_body(200, response.body, response.etag)
+        
+    def _status(self):
+        engine = self.server.engine
+        return {
+            "status": "running",
+            "engine_stats": engine.get_engine_stats(),
+            "sensors": engine.sensors.snapshot(),
+            "metrics": engine.performance_monitor.history.summary(300),
+            "timestamp": datetime.now().isoformat()
+        }
+        
+    def _analytics(self):
+        return self.server.analytics.get_analytics_data("week")
+        
+    def _rules(self):
+        rules_data = [
+            {
+                "name": rule.name,
+                "enabled": rule.enabled,
+                "triggers": len(rule.triggers),
+                "actions": len(rule.actions)
+            }
+            for rule in self.server.engine.rules
+        ]
+        return {"rules": rules_data}
+        
+    def _stream_events(self):
+        """Push live engine events as Server-Sent Events until the client leaves
+        
+        A subscriber that falls behind loses its oldest events; it is told
+        how many with a ``dropped`` event. Streams have their own slot budget,
+        so open streams never hold the slots of ordinary requests.
+        """
+        server = self.server
+        self.close_connection = True
+        subscription = server.open_stream(self.request, server.events, server.event_queue_size)
+        if subscription is None:
+            self._send_json_response(503, {"error": "Too many event streams"})
+            return
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            dropped = 0
+            while True:
+                event = subscription.get(server.event_heartbeat)
+                if subscription.closed:
+                    break
+                if event is None:
+                    # Comment line: keeps proxies open and detects gone clients
+                    self.wfile.write(b": keep-alive\n\n")
+                    continue
+                chunk = b""
+                if subscription.dropped != dropped:
+                    chunk += _sse("dropped", {"count": subscription.dropped - dropped})
+                    dropped = subscription.dropped
+                self.wfile.write(chunk + _sse(event["event"], event))
+        except OSError:
+            pass
+        finally:
+            server.close_stream(subscription)
+            
+    def _send_json_response(self, status_code, data):
+        self._send_body(status_code, json.dumps(data).encode())
+        
+    def _send_body(self, status_code, body: bytes, etag: str = None):
+        self.send_response(status_code)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if etag is not None:
+            # Clients revalidate every time; the server-side TTL keeps it cheap
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+        
+    def log_message(self, format, *args):
+        # Suppress default logging
+        pass
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTP server handing each connection to a bounded thread pool
+    
+    At most ``max_workers`` connections are served at once; further ones
+    get an immediate 503 instead of queueing behind keep-alive clients. A
+    connection that turns into an event stream trades its slot for one of
+    ``max_streams`` stream slots, and the pool has a thread for each of
+    both, so long-lived streams never starve ordinary requests.
+    ``server_close`` also closes the open connections and event streams so
+    workers blocked on an idle client return at once.
+    """
+    
+    def __init__(self, server_address, handler_class, max_workers: int = 8,
+                 request_timeout: float = 10.0, max_streams: int = 4):
+        super().__init__(server_address, handler_class)
+        self.request_timeout = request_timeout
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._stream_slots = threading.BoundedSemaphore(max_streams)
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers + max_streams, thread_name_prefix="appflow-api"
+        )
+        self._connections = set()
+        # Connections holding a stream slot instead of a request slot
+        self._streaming = set()
+        self._streams = set()
+        self._connections_lock = threading.Lock()
+        
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            try:
+                request.sendall(
+                    b"HTTP/1.1 503 Service Unavailable\r\n"
+                    b"Content-Length: 0\r\nConnection: close\r\n\r\n"
+                )
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        with self._connections_lock:
+            self._connections.add(request)
+        self._pool.submit(self._process, request, client_address)
+        
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self._connections_lock:
+                self._connections.discard(request)
+                streaming = request in self._streaming
+                self._streaming.discard(request)
+            self.shutdown_request(request)
+            if streaming:
+                self._stream_slots.release()
+            else:
+                self._slots.release()
+            
+    def open_stream(self, request, events: EventBus, maxsize: int) -> Subscription | None:
+        """Subscribe to *events* for a response that lasts until the server closes
+        
+        Moves *request* from its request slot to a stream slot; returns None
+        when every stream slot is taken.
+        """
+        if not self._stream_slots.acquire(blocking=False):
+            return None
+        subscription = events.subscribe(maxsize)
+        with self._connections_lock:
+            self._streaming.add(request)
+            self._streams.add(subscription)
+        self._slots.release()
+        return subscription
+        
+    def close_stream(self, subscription: Subscription):
+        subscription.close()
+        with self._connections_lock:
+            self._streams.discard(subscription)
+            
+    def handle_error(self, request, client_address):
+        # Clients going away mid-response are routine
+        if not isinstance(sys.exc_info()[1], OSError):
+            super().handle_error(request, client_address)
+            
+    def server_close(self):
+        super().server_close()
+        with self._connections_lock:
+            connections = list(self._connections)
+            streams = list(self._streams)
+        for subscription in streams:
+            subscription.close()
+        for request in connections:
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class APIServer:
+    """HTTP API server for external integrations"""
+    
+    def __init__(self, engine: EnhancedRuleEngine, analytics: AnalyticsManager, 
+                 port: int = 8080, max_workers: int = 8, request_timeout: float = 10.0,
+                 host: str = "localhost", cache_ttl: Dict[str, float] = None,
+                 events: EventBus = None, event_queue_size: int = 256,
+                 event_heartbeat: float = 15.0, max_streams: int = 4):
+        self.engine = engine
+        self.analytics = analytics
+        self.cache = ResponseCache(cache_ttl)
+        self.events = events if events is not None else default_bus
+        self.event_queue_size = event_queue_size
+        self.event_heartbeat = event_heartbeat
+        self.host = host
+        self.port = port
+        self.max_workers = max_workers
+        self.max_streams = max_streams
+        self.request_timeout = request_timeout
+        self.server = None
+        self.server_thread = None
+        self.running = False
+        
+    def start(self):
+        """Start API server in background thread"""
+        if self.running:
+            return
+            
+        try:
+            self.server = PooledHTTPServer(
+                (self.host, self.port), APIRequestHandler,
+                self.max_workers, self.request_timeout, self.max_streams,
+            )
+        except OSError as e:
+            print(f"API server error: {e}")
+            return
+        self.server.engine = self.engine
+        self.server.analytics = self.analytics
+        self.server.cache = self.cache
+        self.server.events = self.events
+        self.server.event_queue_size = self.event_queue_size
+        self.server.event_heartbeat = self.event_heartbeat
+        self.port = self.server.server_address[1]
+        
+        self.running = True
+        self.server_thread = threading.Thread(
+            target=self.server.serve_forever,
+            kwargs={"poll_interval": 0.5},
+            name="appflow-api-server",
+            daemon=True
+        )
+        self.server_thread.start()
+        print(f"API server started on port {self.port}")
+        
+    def stop(self):
+        """Stop API server, closing open connections"""
+        if not self.running:
+            return
+        self.running = False
+        self.server.shutdown()
+        self.server.server_close()
+        self.server_thread.join(timeout=5.0)
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+
+from core.ipc import MAX_MESSAGE_SIZE, address_family, decode, default_address, encode, request
+from core.rule_loader import RuleFileReloader, load_rules, resolve_rules_dir
+from utils.logger import DEFAULT_LOG_PATH, log_event
+
+
+class EngineDaemon:
+    """Serves commands for a running engine over the local command channel.
+
+    ``run``, ``list`` and ``status`` are answered straight from the
+    daemon's threads; ``run`` is refused while the rule is executing. ``reload`` and ``profile`` replace the rule set, so
+    they are handed to the engine loop and applied at the start of its
+    next cycle: the daemon takes the engine's ``reloader`` slot and keeps
+    polling the rule file watcher it replaced.
+    """
+
+    commands = {
+        "run": "_run_rule",
+        "reload": "_reload",
+        "list": "_list",
+        "status": "_status",
+        "profile": "_switch_profile",
+    }
+
+    def __init__(self, engine, profile: str | None = None, rules_dir: Path | None = None,
+                 address: str | None = None, command_timeout: float = 10.0):
+        self.engine = engine
+        self.profile = profile
+        self.rules_dir = rules_dir
+        self.address = address or default_address()
+        self.command_timeout = command_timeout
+        self.started = time.time()
+        # File watcher (RuleFileReloader) polled on the engine's behalf
+        self.files = engine.reloader
+        engine.reloader = self
+        self._pending: queue.SimpleQueue = queue.SimpleQueue()
+        # Held while checking and marking a rule as running
+        self._run_lock = threading.Lock()
+        self._listener = None
+        self._thread = None
+        self._closing = False
+
+    def start(self) -> None:
+        """Listen on the command channel in a background thread."""
+        family = address_family(self.address)
+        if family == "AF_UNIX":
+            self._clear_stale_socket()
+        self._listener = Listener(self.address, family)
+        if family == "AF_UNIX":
+            os.chmod(self.address, 0o600)
+        self._thread = threading.Thread(target=self._serve, name="appflow-daemon", daemon=True)
+        self._thread.start()
+        log_event(f"Daemon listening on {self.address}", self.engine.log_path, event="engine")
+
+    def close(self) -> None:
+        """Stop accepting commands and remove the socket."""
+        if self._listener is None:
+            return
+        self._closing = True
+        # A blocked accept() is not interrupted by closing the listener
+        try:
+            Client(self.address, address_family(self.address)).close()
+        except OSError:
+            pass
+        self._thread.join(timeout=5.0)
+        self._listener.close()
+        self._listener = None
+
+    def poll(self) -> bool:
+        """Apply queued rule changes, then poll the file watcher (engine thread)."""
+        while True:
+            try:
+                apply, future = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(apply())
+            except Exception as e:
+                future.set_exception(e)
+        if self.files is not None:
+            return self.files.poll()
+        return False
+
+    def handle(self, message: dict) -> dict:
+        """Execute one command message and return the reply."""
+        name = self.commands.get(message.get("command"))
+        if name is None:
+            return {"ok": False, "error": f"Unknown command '{message.get('command')}'"}
+        try:
+            result = getattr(self, name)(message)
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+        return {"ok": True, **result}
+
+    def _clear_stale_socket(self) -> None:
+        path = Path(self.address)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            return
+        try:
+            request("status", self.address, timeout=1.0)
+        except OSError:
+            # Left behind by a daemon that did not exit cleanly
+            path.unlink(missing_ok=True)
+            return
+        raise RuntimeError(f"An AppFlow daemon is already listening on {self.address}")
+
+    def _serve(self) -> None:
+        while True:
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                if self._closing:
+                    return
+                continue
+            if self._closing:
+                conn.close()
+                return
+            threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+    def _serve_connection(self, conn) -> None:
+        with conn:
+            try:
+                if not conn.poll(self.command_timeout):
+                    return
+                reply = self.handle(decode(conn.recv_bytes(MAX_MESSAGE_SIZE)))
+                conn.send_bytes(encode(reply))
+            except (OSError, EOFError, ValueError):
+                pass
+
+    def _on_engine(self, apply):
+        """Run *apply* at the engine's next cycle and return its result."""
+        future = Future()
+        self._pending.put((apply, future))
+        try:
+            return future.result(timeout=self.command_timeout)
+        except FutureTimeoutError:
+            # Not the builtin TimeoutError before Python 3.11
+            future.cancel()
+            raise TimeoutError("the engine did not pick up the command in time") from None
+
+    def _check_options(self, message: dict) -> None:
+        """Refuse a client whose --profile, --rules-dir or --log differ from ours."""
+        differing = []
+        if "profile" in message and message["profile"] != self.profile:
+            differing.append(f"--profile {self.profile or '(none)'}")
+        rules_dir = resolve_rules_dir(self.rules_dir).resolve()
+        if "rules_dir" in message and Path(message["rules_dir"]).resolve() != rules_dir:
+            differing.append(f"--rules-dir {rules_dir}")
+        log_path = Path(self.engine.log_path or DEFAULT_LOG_PATH).resolve()
+        if "log" in message and Path(message["log"]).resolve() != log_path:
+            differing.append(f"--log {log_path}")
+        if differing:
+            raise ValueError(
+                f"The running daemon uses {', '.join(differing)}; "
+                "pass the same options or stop the daemon"
+            )
+
+    def _run_rule(self, message: dict) -> dict:
+        self._check_options(message)
+        name = message.get("rule")
+        rule = next((rule for rule in self.engine.rules if rule.name == name), None)
+        if rule is None:
+            raise LookupError(f"Rule not found: {name}")
+        with self._run_lock:
+            # Started by an earlier command or by the engine itself
+            if rule.running:
+                raise RuntimeError(f"Rule {name} is already running")
+            rule.running = True
+        threading.Thread(
+            target=rule.execute,
+            kwargs={"log_path": self.engine.log_path},
+            name="appflow-run",
+            daemon=True,
+        ).start()
+        return {"rule": name}
+
+    def _reload(self, message: dict) -> dict:
+        def apply():
+            self.engine.reload_rules(load_rules(self.profile, self.rules_dir))
+            return {"rules": len(self.engine.rules)}
+
+        return self._on_engine(apply)
+
+    def _switch_profile(self, message: dict) -> dict:
+        profile = message.get("profile") or None
+
+        def apply():
+            if self.files is not None:
+                self.files.close()
+                self.files = RuleFileReloader(self.engine, profile, self.rules_dir)
+                rules = self.files.rules()
+            else:
+                rules = load_rules(profile, self.rules_dir)
+            self.profile = profile
+            self.engine.reload_rules(rules)
+            return {"profile": profile, "rules": len(self.engine.rules)}
+
+        return self._on_engine(apply)
+
+    def _list(self, message: dict) -> dict:
+        return {"rules": [{"name": rule.name, "enabled": rule.enabled} for rule in self.engine.rules]}
+
+    def _status(self, message: dict) -> dict:
+        rules = self.engine.rules
+        return {
+            "pid": os.getpid(),
+            "profile": self.profile,
+            "rules": len(rules),
+            "enabled_rules": sum(1 for rule in rules if rule.enabled),
+            "uptime": time.time() - self.started,
+        }
@@ -0,0 +1,89 @@
+"""Command channel between ``appflow.py`` clients and a running daemon.
+
+Messages are JSON objects, each framed by a 4-byte big-endian length: the
+framing of :mod:`multiprocessing.connection`, which the daemon listens
+with. On POSIX the channel is a Unix socket that clients talk to directly,
+so a one-shot command does not pay for importing multiprocessing; on
+Windows it is a named pipe.
+"""
+from __future__ import annotations
+
+import json
+import os
+import socket
+import struct
+import sys
+from pathlib import Path
+
+# Commands and replies are small; anything bigger is a protocol error
+MAX_MESSAGE_SIZE = 1 << 20
+
+_HEADER = struct.Struct("!i")
+
+
+def default_address() -> str:
+    """Return ``$APPFLOW_SOCKET`` or the per-user socket (pipe) address."""
+    address = os.getenv("APPFLOW_SOCKET")
+    if address:
+        return address
+    if sys.platform == "win32":
+        return rf"\\.\pipe\appflow-{os.getenv('USERNAME', 'user')}"
+    env_dir = os.getenv("APPFLOW_CACHE_DIR")
+    cache_dir = Path(env_dir) if env_dir else Path.home() / ".cache" / "appflow"
+    return str(cache_dir / "appflow.sock")
+
+
+def address_family(address: str) -> str:
+    """Return the :mod:`multiprocessing.connection` family of *address*."""
+    return "AF_PIPE" if address.startswith("\\\\") else "AF_UNIX"
+
+
+def encode(message: dict) -> bytes:
+    return json.dumps(message).encode()
+
+
+def decode(payload: bytes) -> dict:
+    message = json.loads(payload)
+    if not isinstance(message, dict):
+        raise ValueError("message must be a JSON object")
+    return message
+
+
+def request(command: str, address: str | None = None, timeout: float = 5.0,
+            **arguments) -> dict:
+    """Send *command* to the daemon and return its reply.
+
+    Raises ``FileNotFoundError`` or ``ConnectionRefusedError`` when no
+    daemon is listening, and other ``OSError`` if the exchange fails.
+    """
+    if address is None:
+        address = default_address()
+    payload = encode({"command": command, **arguments})
+
+    if address_family(address) == "AF_PIPE":
+        from multiprocessing.connection import Client
+
+        with Client(address, "AF_PIPE") as conn:
+            conn.send_bytes(payload)
+            if not conn.poll(timeout):
+                raise TimeoutError("no reply from the AppFlow daemon")
+            return decode(conn.recv_bytes(MAX_MESSAGE_SIZE))
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(address)
+        sock.sendall(_HEADER.pack(len(payload)) + payload)
+        (size,) = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+        if not 0 <= size <= MAX_MESSAGE_SIZE:
+            raise ConnectionError(f"invalid reply size {size}")
+        return decode(_recv_exactly(sock, size))
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("daemon closed the connection")
+        data += chunk
+    return bytes(data)
@@ -0,0 +1,61 @@
+from utils.system import ProcessSnapshot
+
+
+class ProcessEvents:
+    """Application start/exit transitions observed between two snapshots."""
+
+    def __init__(self, started: set[str] | None = None, exited: set[str] | None = None):
+        self.started = started or set()
+        self.exited = exited or set()
+
+    @property
+    def changed(self) -> set[str]:
+        """Names that either started or exited."""
+        return self.started | self.exited
+
+    def __bool__(self):
+        return bool(self.started or self.exited)
+
+    def __repr__(self):
+        return f"ProcessEvents(started={self.started!r}, exited={self.exited!r})"
+
+
+class ProcessEventSource:
+    """Turns successive process snapshots into start/exit events.
+
+    Each snapshot's PID sets are diffed against the previous one. A name
+    starts when it appears, exits when it disappears, and does both when every
+    PID was replaced between polls (the app was restarted). The first snapshot
+    is diffed against an empty table, so apps already running when the engine
+    starts are reported as started once; a single snapshot (``--once``) can
+    therefore never report an exit. After :meth:`reset` the next snapshot
+    only becomes the new baseline.
+    """
+
+    def __init__(self):
+        self._pids: dict[str, set[int]] | None = {}
+
+    def reset(self) -> None:
+        """Take the next snapshot as the baseline without reporting events."""
+        self._pids = None
+
+    def update(self, processes: ProcessSnapshot) -> ProcessEvents:
+        """Record *processes* as the current state and return the transitions."""
+        current = {name: set(pids) for name, pids in processes.table.items()}
+        previous = self._pids
+        if previous is None:
+            self._pids = current
+            return ProcessEvents()
+
+        started = set()
+        exited = {name for name in previous if name not in current}
+        for name, pids in current.items():
+            old = previous.get(name)
+            if old is None:
+                started.add(name)
+            elif old.isdisjoint(pids):
+                started.add(name)
+                exited.add(name)
+
+        self._pids = current
+        return ProcessEvents(started, exited)
@@ -1,64 +1,265 @@
-import subprocess
+from __future__ import annotations
+
+import threading
 import time
-import webbrowser
 import os
-import datetime
-import psutil
 
+from core.process_events import ProcessEventSource
+from core.scheduler import Scheduler
+from core.triggers import CycleContext, compile_triggers
 from utils.system import (
-    is_process_running,
-    get_battery_percent,
-    get_cpu_percent,
-    get_network_bytes_per_sec,
+    ProcessSnapshot,
+    SensorHub,
+    kill_process,
     send_notification,
+    send_notification_async,
+    sensors as default_sensors,
 )
+from utils.lazy import LazyModule
 from utils.logger import log_event
 
+# Only needed once rules actually run
+asyncio = LazyModule("asyncio")
+subprocess = LazyModule("subprocess")
+webbrowser = LazyModule("webbrowser")
 
 
 class RuleEngine:
     """Simple engine that evaluates rules and executes matching actions."""
 
-    def __init__(self, rules, poll_interval: float = 2.0, log_path=None, run_once: bool = False):
-        self.rules = [Rule(r) for r in rules]
+    def __init__(self, rules, poll_interval: float = 2.0, log_path=None, run_once: bool = False,
+                 sensors: SensorHub | None = None):
         self.poll_interval = poll_interval
         self.log_path = log_path
+        self.sensors = sensors if sensors is not None else default_sensors
+        self.sensors.prime()
+        self.process_events = ProcessEventSource()
+        self.scheduler = Scheduler()
+        # Optional RuleFileReloader polled at the start of every cycle
+        self.reloader = None
+        # Bumped on every rule install so readers can tell the set changed
+        self.rules_version = 0
+        self._set_rules(self._compile_rules(rules), initial=True)
         self.run_once = run_once
 
     def run(self):
         """Continuously check rules and execute them when triggers match."""
-        log_event("Rule engine started", self.log_path)
+        log_event("Rule engine started", self.log_path, event="engine")
         try:
             while True:
-                for rule in self.rules:
-                    if rule.check_triggers():
-                        rule.execute(log_path=self.log_path)
+                context, candidates = self._begin_cycle()
+                for rule in candidates:
+                    if rule.check_triggers(context):
+                        rule.execute(log_path=self.log_path, processes=context.processes)
                 if self.run_once:
                     break
-                time.sleep(self.poll_interval)
+                time.sleep(self._idle_time())
         except KeyboardInterrupt:
             print("Rule engine stopped")
         finally:
-            log_event("Rule engine stopped", self.log_path)
+            log_event("Rule engine stopped", self.log_path, event="engine")
 
     def reload_rules(self, new_rules):
-        """Hot reload rules without restarting the engine."""
-        self.rules = [Rule(r) for r in new_rules]
-        log_event("Rules reloaded", self.log_path)
+        """Hot reload rules without restarting the engine.
+
+        Rules are matched by name: unchanged rules are kept as-is with their
+        cooldown and schedule, modified rules are rebuilt but keep their last
+        execution time, and only added rules start fresh.
+        """
+        previous: dict[str, list[Rule]] = {}
+        for rule in self.rules:
+            previous.setdefault(rule.name, []).append(rule)
+
+        rules = []
+        added = modified = 0
+        for data in new_rules:
+            candidates = previous.get(data.get('name', 'Unnamed'))
+            old = candidates.pop(0) if candidates else None
+            if old is not None and old.data == data:
+                rules.append(old)
+                continue
+            try:
+                rule = Rule(data)
+            except ValueError as e:
+                log_event(f"Skipping rule {data.get('name', 'Unnamed')}: {e}", self.log_path,
+                          event="error", rule=data.get('name'))
+                continue
+            if old is not None:
+                rule.last_execution = old.last_execution
+                modified += 1
+            else:
+                added += 1
+            rules.append(rule)
+
+        removed = sum(len(candidates) for candidates in previous.values())
+        self._set_rules(rules)
+        log_event(
+            f"Rules reloaded: {added} added, {modified} modified, {removed} removed",
+            self.log_path, event="reload",
+        )
+
+    def _set_rules(self, rules: list["Rule"], initial: bool = False):
+        """Install compiled *rules* and sync the scheduler with their time triggers.
+
+        Time triggers that were already scheduled keep their pending deadline,
+        and a rebuilt trigger takes over the deadline of a replaced one at the
+        same minute, so editing a rule never fires an occurrence twice. Other
+        triggers added by a reload start after the current time; only the
+        initial rules may fire within the current minute.
+
+        When a reload changes the watched apps, the process table is not
+        known to be current, so the next one is taken as the new baseline
+        rather than diffed.
+        """
+        self.rules = rules
+        self.rules_version += 1
+        watched = frozenset().union(*(rule.watches for rule in rules))
+        if not initial and watched != self._watched:
+            self.process_events.reset()
+        self._watched = watched
+        self._watching = bool(watched)
+        scheduled = {trigger for rule in rules for trigger in rule.schedule}
+        replaced = {}
+        for trigger, deadline in self.scheduler.deadlines().items():
+            if trigger not in scheduled:
+                replaced.setdefault(trigger.minute, deadline)
+        self.scheduler.retain(scheduled)
+        now = time.time()
+        for trigger in scheduled - self.scheduler.triggers():
+            self.scheduler.add(trigger, now, deadline=replaced.get(trigger.minute),
+                               current_minute=initial)
+
+    def _begin_cycle(self) -> tuple[CycleContext, list["Rule"]]:
+        """Collect this cycle's events and pick the rules worth checking.
+
+        Rules waiting on app starts/exits or on a scheduled time can only
+        fire when one of those events happens, so they are skipped on cycles
+        where none did. The process table is only read when some rule
+        watches processes. A rule still executing, for instance one started
+        through the daemon, is not checked again.
+        """
+        if self.reloader is not None:
+            self.reloader.poll()
+        due = self.scheduler.pop_due()
+        # One process table per cycle, shared by every rule
+        processes = ProcessSnapshot()
+        changed = set()
+        events = None
+        if self._watching:
+            events = self.process_events.update(processes)
+            changed = events.changed
+        context = CycleContext(processes, events, due, self.sensors)
+        candidates = [
+            rule for rule in self.rules
+            if not rule.running
+            and (not rule.event_driven
+                 or not rule.watches.isdisjoint(changed)
+                 or not rule.schedule.isdisjoint(due))
+        ]
+        return context, candidates
+
+    def _idle_time(self, elapsed: float = 0.0) -> float:
+        """Return how long to sleep before the next cycle.
+
+        Normally the rest of ``poll_interval``, but never past the next
+        scheduled deadline so time triggers fire on time.
+        """
+        wait = self.poll_interval - elapsed
+        deadline = self.scheduler.next_deadline()
+        if deadline is not None:
+            wait = min(wait, deadline - time.time())
+        return max(wait, 0.0)
+
+    def _compile_rules(self, rules) -> list["Rule"]:
+        """Compile rule dicts, skipping (and logging) invalid ones."""
+        compiled = []
+        for data in rules:
+            try:
+                compiled.append(Rule(data))
+            except ValueError as e:
+                log_event(f"Skipping rule {data.get('name', 'Unnamed')}: {e}", self.log_path,
+                          event="error", rule=data.get('name'))
+        return compiled
+
+
+class AsyncRuleEngine(RuleEngine):
+    """Rule engine running each rule execution as its own asyncio task.
+
+    The trigger loop keeps ticking on schedule while actions are in flight,
+    so a long ``wait`` in one rule no longer holds up every other rule. A
+    rule is not started again while a previous execution is still running.
+    """
+
+    def __init__(self, rules, poll_interval: float = 2.0, log_path=None, run_once: bool = False,
+                 sensors: SensorHub | None = None):
+        super().__init__(rules, poll_interval, log_path, run_once, sensors)
+        self._tasks: dict[Rule, asyncio.Task] = {}
+
+    def run(self):
+        """Run the async loop until interrupted."""
+        try:
+            asyncio.run(self.run_async())
+        except KeyboardInterrupt:
+            print("Rule engine stopped")
+
+    async def run_async(self):
+        """Check rules every cycle and start matching ones as tasks."""
+        log_event("Rule engine started", self.log_path, event="engine")
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                start_time = loop.time()
+                context, candidates = self._begin_cycle()
+                for rule in candidates:
+                    if rule in self._tasks:
+                        continue
+                    if rule.check_triggers(context):
+                        self._start(rule, context)
+                if self.run_once:
+                    await asyncio.gather(*self._tasks.values())
+                    break
+                await asyncio.sleep(self._idle_time(loop.time() - start_time))
+        finally:
+            for task in list(self._tasks.values()):
+                task.cancel()
+            log_event("Rule engine stopped", self.log_path, event="engine")
+
+    def _start(self, rule: "Rule", context: CycleContext) -> asyncio.Task:
+        task = asyncio.create_task(
+            rule.execute_async(log_path=self.log_path, processes=context.processes)
+        )
+        self._tasks[rule] = task
+        task.add_done_callback(lambda _: self._tasks.pop(rule, None))
+        return task
 
 
 class Rule:
     def __init__(self, data):
+        # Source definition, compared on reload to detect changes
+        self.data = data
         self.name = data.get('name', 'Unnamed')
         self.triggers = data.get('triggers', [])
         self.actions = data.get('actions', [])
         self.has_run = False
-        self.cooldown = data.get('cooldown', 0)  # cooldown in seconds
+        self.cooldown = float(data.get('cooldown', 0))  # cooldown in seconds
+        # Pre-built predicates, cheapest first so costly sensors are often skipped
+        self.plan = sorted(compile_triggers(self.triggers), key=lambda t: t.cost)
+        # App names whose start/exit this rule waits for
+        self.watches = {t.value for t in self.plan if t.needs_processes}
+        # Time triggers handled by the engine's scheduler
+        self.schedule = {t for t in self.plan if t.scheduled}
+        self.event_driven = bool(self.watches or self.schedule)
         self.last_execution = 0
         self.enabled = data.get('enabled', True)
+        # True while an execution is in progress, whoever started it
+        self.running = False
 
-    def check_triggers(self) -> bool:
-        """Return True if rule triggers are satisfied."""
+    def check_triggers(self, context: CycleContext | None = None) -> bool:
+        """Return True if rule triggers are satisfied.
+
+        ``context`` carries the cycle's shared process snapshot and events; a
+        private one is created on demand when it is omitted.
+        """
         
         if not self.enabled:
             return False
@@ -70,74 +271,134 @@ class Rule:
         if not self.triggers:
             return True
 
+        if context is None:
+            context = CycleContext()
+
         # All triggers must be satisfied (AND logic)
-        for trig in self.triggers:
-            if 'app_start' in trig:
-                if not is_process_running(trig['app_start']):
-                    return False
-            elif 'app_exit' in trig:
-                if is_process_running(trig['app_exit']):
-                    return False
-            elif 'at_time' in trig:
-                target = trig['at_time']
-                now = datetime.datetime.now().strftime('%H:%M')
-                if now != target:
-                    return False
-            elif 'battery_below' in trig:
-                level = get_battery_percent()
-                if level is None or level >= float(trig['battery_below']):
-                    return False
-            elif 'cpu_above' in trig:
-                cpu = get_cpu_percent(interval=0.1)
-                if cpu <= float(trig['cpu_above']):
-                    return False
-            elif 'network_above' in trig:
-                net = get_network_bytes_per_sec()
-                if net <= float(trig['network_above']) * 1024:
-                    return False
+        for trigger in self.plan:
+            if not trigger.matches(context):
+                return False
 
         return True
 
-    def execute(self, log_path=None):
-        """Execute rule actions sequentially."""
+    def execute(self, log_path=None, processes: ProcessSnapshot | None = None,
+                cancel: threading.Event | None = None):
+        """Execute rule actions sequentially.
+
+        When ``cancel`` is given and gets set, waits are cut short and the
+        remaining actions are skipped.
+        """
+        self.running = True
+        try:
+            self._execute(log_path, processes, cancel)
+        finally:
+            self.running = False
+
+    def _execute(self, log_path, processes, cancel):
         if not self.enabled:
             return
+
+        if processes is None:
+            processes = ProcessSnapshot()
             
-        log_event(f"Executing rule: {self.name}", log_path)
+        log_event(f"Executing rule: {self.name}", log_path, event="rule_start", rule=self.name)
         self.last_execution = time.time()
         
         for action in self.actions:
+            if cancel is not None and cancel.is_set():
+                log_event(f"Cancelled rule: {self.name}", log_path, event="rule_cancelled",
+                          rule=self.name, duration=time.time() - self.last_execution)
+                return
             try:
                 if 'launch' in action:
                     subprocess.Popen(action['launch'], shell=True)
-                    log_event(f"launch -> {action['launch']}", log_path)
+                    self._log_action('launch', action['launch'], log_path)
                 elif 'kill' in action:
-                    for p in psutil.process_iter(['name']):
-                        if p.info['name'] == action['kill']:
-                            p.terminate()
-                    log_event(f"kill -> {action['kill']}", log_path)
+                    kill_process(action['kill'], processes)
+                    self._log_action('kill', action['kill'], log_path)
                 elif 'wait' in action:
-                    time.sleep(action['wait'])
-                    log_event(f"wait -> {action['wait']}", log_path)
+                    if cancel is not None:
+                        cancel.wait(action['wait'])
+                    else:
+                        time.sleep(action['wait'])
+                    self._log_action('wait', action['wait'], log_path)
                 elif 'notify' in action:
                     send_notification(action['notify'])
-                    log_event(f"notify -> {action['notify']}", log_path)
+                    self._log_action('notify', action['notify'], log_path)
                 elif 'open_url' in action:
                     url = action['open_url']
-                    # Handle both URLs and file paths
-                    if url.startswith(('http://', 'https://', 'file://')):
-                        webbrowser.open(url)
-                    elif os.path.exists(url):
-                        # Open file with default application
-                        if os.name == 'nt':  # Windows
-                            os.startfile(url)
-                        elif os.name == 'posix':  # macOS and Linux
-                            subprocess.run(['open' if os.uname().sysname == 'Darwin' else 'xdg-open', url])
-                    else:
-                        # Assume it's a URL without protocol
-                        webbrowser.open(f"https://{url}")
-                    log_event(f"open_url -> {url}", log_path)
+                    open_url(url)
+                    self._log_action('open_url', url, log_path)
             except Exception as e:
-                log_event(f"Error executing action {action}: {e}", log_path)
+                log_event(f"Error executing action {action}: {e}", log_path,
+                          event="error", rule=self.name)
+
+        log_event(f"Finished rule: {self.name}", log_path, event="rule_end", rule=self.name,
+                  duration=time.time() - self.last_execution)
+
+    def _log_action(self, kind: str, target, log_path=None):
+        log_event(f"{kind} -> {target}", log_path, event="action", rule=self.name,
+                  action=kind, target=target)
+
+    async def execute_async(self, log_path=None, processes: ProcessSnapshot | None = None):
+        """Execute rule actions without blocking the event loop.
+
+        Same actions as :meth:`execute`, but ``wait`` yields to other rules and
+        launches and notifications run as async subprocesses.
+        """
+        self.running = True
+        try:
+            await self._execute_async(log_path, processes)
+        finally:
+            self.running = False
+
+    async def _execute_async(self, log_path, processes):
+        if not self.enabled:
+            return
+
+        if processes is None:
+            processes = ProcessSnapshot()
+
+        log_event(f"Executing rule: {self.name}", log_path, event="rule_start", rule=self.name)
+        self.last_execution = time.time()
+
+        for action in self.actions:
+            try:
+                if 'launch' in action:
+                    await asyncio.create_subprocess_shell(action['launch'])
+                    self._log_action('launch', action['launch'], log_path)
+                elif 'kill' in action:
+                    kill_process(action['kill'], processes)
+                    self._log_action('kill', action['kill'], log_path)
+                elif 'wait' in action:
+                    await asyncio.sleep(action['wait'])
+                    self._log_action('wait', action['wait'], log_path)
+                elif 'notify' in action:
+                    await send_notification_async(action['notify'])
+                    self._log_action('notify', action['notify'], log_path)
+                elif 'open_url' in action:
+                    url = action['open_url']
+                    await asyncio.to_thread(open_url, url)
+                    self._log_action('open_url', url, log_path)
+            except Exception as e:
+                log_event(f"Error executing action {action}: {e}", log_path,
+                          event="error", rule=self.name)
+
+        log_event(f"Finished rule: {self.name}", log_path, event="rule_end", rule=self.name,
+                  duration=time.time() - self.last_execution)
+
 
-        log_event(f"Finished rule: {self.name}", log_path)
+def open_url(url: str) -> None:
+    """Open a URL in the browser or a file with its default application."""
+    # Handle both URLs and file paths
+    if url.startswith(('http://', 'https://', 'file://')):
+        webbrowser.open(url)
+    elif os.path.exists(url):
+        # Open file with default application
+        if os.name == 'nt':  # Windows
+            os.startfile(url)
+        elif os.name == 'posix':  # macOS and Linux
+            subprocess.run(['open' if os.uname().sysname == 'Darwin' else 'xdg-open', url])
+    else:
+        # Assume it's a URL without protocol
+        webbrowser.open(f"https://{url}")
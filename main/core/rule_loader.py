@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+
+from utils.lazy import LazyModule
+from utils.logger import log_event
+
+# A warm start served from the rule cache never needs the YAML parser, and
+# only a reloader watches files
+file_watcher = LazyModule("utils.file_watcher")
+yaml = LazyModule("yaml")
+
+
+DEFAULT_RULES_DIR = (
+    Path(__file__).resolve().parent.parent.parent
+    / "frontend"
+    / "public"
+    / "rules"
+)
+
+
+# Loader override; by default libyaml's C loader, an order of magnitude
+# faster, when available
+YAML_LOADER = None
+
+
+def resolve_rules_dir(rules_dir: Path | None = None) -> Path:
+    """Return *rules_dir*, ``$APPFLOW_RULES_DIR`` or the bundled rules directory."""
+    if rules_dir is None:
+        env_dir = os.getenv("APPFLOW_RULES_DIR")
+        rules_dir = Path(env_dir) if env_dir else DEFAULT_RULES_DIR
+    return Path(rules_dir)
+
+
+def rule_directories(profile: str | None = None, rules_dir: Path | None = None) -> list[Path]:
+    """Return the directories rule files for *profile* can live in."""
+    rules_dir = resolve_rules_dir(rules_dir)
+    directories = [rules_dir]
+    if profile:
+        directories.append(rules_dir / profile)
+    return directories
+
+
+def rule_files(profile: str | None = None, rules_dir: Path | None = None) -> list[Path]:
+    """Return the rule files to load, in load order.
+
+    Always ``default.yaml`` if present. When ``profile`` is specified,
+    additional files from ``<rules_dir>/<profile>.yaml`` and ``<rules_dir>/<profile>/``
+    are loaded if they exist.
+    """
+    rules_dir = resolve_rules_dir(rules_dir)
+    files: list[Path] = []
+
+    default_file = rules_dir / "default.yaml"
+    if default_file.exists():
+        files.append(default_file)
+
+    if profile:
+        profile_file = rules_dir / f"{profile}.yaml"
+        if profile_file.exists():
+            files.append(profile_file)
+        profile_dir = rules_dir / profile
+        if profile_dir.is_dir():
+            files.extend(sorted(profile_dir.glob("*.yaml")))
+
+    return files
+
+
+def parse_rules(content: bytes) -> list[dict]:
+    """Parse YAML rule file content and return its list of rules."""
+    loader = YAML_LOADER or getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    data = yaml.load(content, Loader=loader)
+    return data if isinstance(data, list) else []
+
+
+class RuleCache:
+    """On-disk cache of parsed rule files.
+
+    Entries are keyed by the file's path and validated against its mtime and
+    size, falling back to a content hash when those changed (e.g. the file
+    was touched or rewritten with the same content). Parsed rules are stored
+    pickled so a warm start skips YAML entirely. Each cache miss also prunes
+    the entries of rule files that no longer exist.
+    """
+
+    def __init__(self, cache_dir: Path | None = None):
+        if cache_dir is None:
+            env_dir = os.getenv("APPFLOW_CACHE_DIR")
+            cache_dir = Path(env_dir) if env_dir else Path.home() / ".cache" / "appflow"
+        self.cache_dir = Path(cache_dir) / "rules"
+
+    def _entry_path(self, rule_file: Path) -> Path:
+        key = hashlib.sha1(os.fsencode(Path(rule_file).resolve())).hexdigest()
+        return self.cache_dir / f"{key}.pickle"
+
+    def _read_entry(self, entry_path: Path) -> dict | None:
+        try:
+            with open(entry_path, "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    def _write_entry(self, entry_path: Path, entry: dict) -> None:
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry_path)
+        except OSError:
+            # A read-only cache only costs speed
+            pass
+
+    def load(self, rule_file: Path) -> list[dict]:
+        """Return the rules of *rule_file*, parsing it only on a cache miss."""
+        st = os.stat(rule_file)
+        entry_path = self._entry_path(rule_file)
+        entry = self._read_entry(entry_path)
+        if entry is not None and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            return entry["rules"]
+
+        with open(rule_file, "rb") as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()
+        if entry is not None and entry["sha256"] == digest:
+            rules = entry["rules"]
+        else:
+            rules = parse_rules(content)
+        self._write_entry(entry_path, {
+            "path": os.fspath(Path(rule_file).resolve()),
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "sha256": digest,
+            "rules": rules,
+        })
+        self.prune()
+        return rules
+
+    def prune(self) -> int:
+        """Remove the entries of rule files that no longer exist; return how many."""
+        try:
+            entry_paths = list(self.cache_dir.glob("*.pickle"))
+        except OSError:
+            return 0
+        removed = 0
+        for entry_path in entry_paths:
+            entry = self._read_entry(entry_path)
+            # Entries written before the source path was recorded count as stale
+            if entry is not None and os.path.exists(entry.get("path", "")):
+                continue
+            try:
+                entry_path.unlink()
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+rule_cache = RuleCache()
+
+
+def load_rule_file(rule_file: Path, cache: RuleCache | None = rule_cache) -> list[dict]:
+    """Return the list of rules in one YAML rule file.
+
+    Goes through *cache* unless it is None.
+    """
+    if cache is not None:
+        return cache.load(rule_file)
+    with open(rule_file, "rb") as f:
+        return parse_rules(f.read())
+
+
+def load_rules(profile: str | None = None, rules_dir: Path | None = None,
+               cache: RuleCache | None = rule_cache) -> list[dict]:
+    """Load YAML rule files from *rules_dir*.
+
+    Always load ``default.yaml`` if present. When ``profile`` is specified,
+    additional files from ``<rules_dir>/<profile>.yaml`` and ``<rules_dir>/<profile>/``
+    are loaded if they exist. A file that fails to load is reported and skipped.
+    """
+    rules: list[dict] = []
+
+    for rule_file in rule_files(profile, rules_dir):
+        try:
+            rules.extend(load_rule_file(rule_file, cache))
+        except Exception as e:
+            print(f"Error loading {rule_file}: {e}")
+
+    return rules
+
+
+class RuleFileReloader:
+    """Keeps an engine's rules in sync with the rule files on disk.
+
+    The rule directories are watched (inotify on Linux, mtime polling
+    elsewhere). On each :meth:`poll` only files reported as changed are
+    re-parsed, and the engine's ``reload_rules`` diffs the result by rule
+    name so unchanged rules keep their runtime state.
+    """
+
+    def __init__(self, engine, profile: str | None = None, rules_dir: Path | None = None):
+        self.engine = engine
+        self.profile = profile
+        self.rules_dir = resolve_rules_dir(rules_dir)
+        self.watcher = file_watcher.watch_directories(rule_directories(profile, self.rules_dir))
+        self._parsed: dict[Path, list[dict]] = {}
+        for path in rule_files(profile, self.rules_dir):
+            self._parsed[path] = self._parse(path, [])
+
+    def _parse(self, path: Path, fallback: list[dict]) -> list[dict]:
+        try:
+            return load_rule_file(path)
+        except Exception as e:
+            # Keep the last good version while the file is being edited
+            log_event(f"Error loading {path}: {e}", self.engine.log_path)
+            return fallback
+
+    def rules(self) -> list[dict]:
+        """Return the currently loaded rule definitions in load order."""
+        return [rule for rules in self._parsed.values() for rule in rules]
+
+    def poll(self) -> bool:
+        """Reload the engine if any rule file changed; return True if it did."""
+        changed = self.watcher.changes()
+        if not changed:
+            return False
+
+        parsed = {}
+        for path in rule_files(self.profile, self.rules_dir):
+            previous = self._parsed.get(path)
+            if previous is None or path in changed:
+                parsed[path] = self._parse(path, previous or [])
+            else:
+                parsed[path] = previous
+        self._parsed = parsed
+        self.engine.reload_rules(self.rules())
+        return True
+
+    def close(self) -> None:
+        self.watcher.close()
@@ -0,0 +1,81 @@
+import heapq
+import itertools
+import time
+from datetime import datetime, timedelta
+
+
+def next_occurrence(minute_of_day: int, after: float) -> float:
+    """Return the first local-time epoch strictly after *after* at *minute_of_day*."""
+    base = datetime.fromtimestamp(after).replace(second=0, microsecond=0)
+    candidate = base.replace(hour=minute_of_day // 60, minute=minute_of_day % 60)
+    while candidate.timestamp() <= after:
+        candidate += timedelta(days=1)
+    return candidate.timestamp()
+
+
+class Scheduler:
+    """Min-heap of deadlines for time-based triggers.
+
+    Each trigger (anything with a ``minute`` attribute) has exactly one pending
+    deadline. ``pop_due`` hands every expired trigger out once and schedules
+    its next occurrence after the current time. Occurrences missed during a
+    suspend or a long stall therefore collapse into a single late fire. If
+    ``misfire_grace`` is set, a fire that is later than that many seconds is
+    dropped instead.
+    """
+
+    def __init__(self, misfire_grace: float | None = None):
+        self.misfire_grace = misfire_grace
+        self._heap: list[tuple[float, int, object]] = []
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def add(self, trigger, now: float | None = None, *, deadline: float | None = None,
+            current_minute: bool = True) -> None:
+        """Schedule *trigger* at *deadline*, or else at its next occurrence.
+
+        The next occurrence may fall in the current minute unless
+        *current_minute* is False.
+        """
+        if deadline is None:
+            if now is None:
+                now = time.time()
+            deadline = next_occurrence(trigger.minute, now - 60 if current_minute else now)
+        heapq.heappush(self._heap, (deadline, next(self._counter), trigger))
+
+    def clear(self) -> None:
+        self._heap.clear()
+
+    def triggers(self) -> set:
+        """Return every trigger with a pending deadline."""
+        return {entry[2] for entry in self._heap}
+
+    def deadlines(self) -> dict:
+        """Return the pending deadline of every scheduled trigger."""
+        return {entry[2]: entry[0] for entry in self._heap}
+
+    def retain(self, keep: set) -> None:
+        """Drop the pending deadlines of triggers not in *keep*."""
+        self._heap = [entry for entry in self._heap if entry[2] in keep]
+        heapq.heapify(self._heap)
+
+    def next_deadline(self) -> float | None:
+        """Return the earliest pending deadline, or None when empty."""
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float | None = None) -> set:
+        """Return the triggers whose deadline has passed and reschedule them."""
+        if now is None:
+            now = time.time()
+        due = set()
+        while self._heap and self._heap[0][0] <= now:
+            deadline, _, trigger = heapq.heappop(self._heap)
+            if self.misfire_grace is None or now - deadline <= self.misfire_grace:
+                due.add(trigger)
+            heapq.heappush(
+                self._heap,
+                (next_occurrence(trigger.minute, now), next(self._counter), trigger),
+            )
+        return due
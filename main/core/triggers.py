@@ -0,0 +1,170 @@
+import time
+
+from utils.system import ProcessSnapshot, SensorHub, sensors as default_sensors
+
+
+class CycleContext:
+    """State shared by every rule during one poll cycle.
+
+    ``events`` holds the process transitions seen this cycle and ``due`` the
+    time triggers whose deadline has passed. Without an engine (e.g. a rule
+    checked on its own) they are None and triggers fall back to testing the
+    current state: whether the app is running, whether the clock shows the
+    target minute. Sensor readings come from the shared, cached ``sensors``.
+    """
+
+    def __init__(self, processes: ProcessSnapshot | None = None, events=None, due=None,
+                 sensors: SensorHub | None = None):
+        self.processes = processes if processes is not None else ProcessSnapshot()
+        self.events = events
+        self.due = due
+        self.sensors = sensors if sensors is not None else default_sensors
+
+
+class Trigger:
+    """A compiled trigger: one pre-parsed condition of a rule."""
+
+    key = ""
+    # True when the predicate reads the process table
+    needs_processes = False
+    # True when the engine's scheduler decides when the predicate holds
+    scheduled = False
+    # Relative evaluation cost, used to order a rule's plan
+    cost = 0
+
+    def __init__(self, value):
+        self.value = value
+
+    def matches(self, context: CycleContext) -> bool:
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.value!r})"
+
+
+class AppStartTrigger(Trigger):
+    """Fires on the cycle where the app is seen starting."""
+
+    key = "app_start"
+    needs_processes = True
+    cost = 2
+
+    def __init__(self, value):
+        super().__init__(str(value))
+
+    def matches(self, context):
+        if context.events is None:
+            return context.processes.is_running(self.value)
+        return self.value in context.events.started
+
+
+class AppExitTrigger(AppStartTrigger):
+    """Fires on the cycle where the app is seen exiting."""
+
+    key = "app_exit"
+
+    def matches(self, context):
+        if context.events is None:
+            return not context.processes.is_running(self.value)
+        return self.value in context.events.exited
+
+
+class AtTimeTrigger(Trigger):
+    """Fires once per day at the given local ``HH:MM``."""
+
+    key = "at_time"
+    scheduled = True
+
+    def __init__(self, value):
+        super().__init__(str(value))
+        self.minute = parse_minute_of_day(self.value)
+
+    def matches(self, context):
+        if context.due is None:
+            now = time.localtime()
+            return now.tm_hour * 60 + now.tm_min == self.minute
+        return self in context.due
+
+
+class BatteryBelowTrigger(Trigger):
+    key = "battery_below"
+    cost = 1
+
+    def __init__(self, value):
+        super().__init__(float(value))
+
+    def matches(self, context):
+        level = context.sensors.battery_percent()
+        return level is not None and level < self.value
+
+
+class CpuAboveTrigger(Trigger):
+    key = "cpu_above"
+    cost = 1
+
+    def __init__(self, value):
+        super().__init__(float(value))
+
+    def matches(self, context):
+        return context.sensors.cpu_percent() > self.value
+
+
+class NetworkAboveTrigger(Trigger):
+    key = "network_above"
+    cost = 1
+
+    def __init__(self, value):
+        # Rules express the threshold in KB/s
+        super().__init__(float(value))
+        self.bytes_per_sec = self.value * 1024
+
+    def matches(self, context):
+        return context.sensors.network_bytes_per_sec() > self.bytes_per_sec
+
+
+TRIGGER_TYPES = {
+    cls.key: cls
+    for cls in (
+        AppStartTrigger,
+        AppExitTrigger,
+        AtTimeTrigger,
+        BatteryBelowTrigger,
+        CpuAboveTrigger,
+        NetworkAboveTrigger,
+    )
+}
+
+
+def parse_minute_of_day(value: str) -> int:
+    """Convert an ``HH:MM`` string to minutes since midnight."""
+    try:
+        hours, minutes = (int(part) for part in value.split(":"))
+    except ValueError:
+        raise ValueError(f"Invalid at_time '{value}', expected HH:MM") from None
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"Invalid at_time '{value}', expected HH:MM")
+    return hours * 60 + minutes
+
+
+def compile_triggers(triggers) -> list[Trigger]:
+    """Compile a rule's raw trigger dicts into a list of predicates.
+
+    Raises ``ValueError`` for unknown trigger keys or malformed values so bad
+    rules are rejected at load time instead of on every poll.
+    """
+    if not isinstance(triggers, list):
+        raise ValueError("'triggers' must be a list")
+
+    plan: list[Trigger] = []
+    for trig in triggers:
+        if not isinstance(trig, dict):
+            raise ValueError(f"Invalid trigger {trig!r}")
+        for key, value in trig.items():
+            trigger_type = TRIGGER_TYPES.get(key)
+            if trigger_type is None:
+                raise ValueError(f"Unknown trigger '{key}'")
+            try:
+                plan.append(trigger_type(value))
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Invalid value for '{key}': {e}") from None
+    return plan
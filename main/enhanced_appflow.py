@@ -1,47 +1,591 @@
-                ORDER BY rule_count DESC
-                LIMIT 1
-            """, (start_date,)).fetchall()
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import queue
+import signal
+import sys
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict
+
+from core.rule_engine import RuleEngine
+from core.rule_loader import DEFAULT_RULES_DIR, RuleFileReloader, load_rules
+from core.triggers import compile_triggers
+from utils.event_bus import EventBus, bus as default_bus
+from utils.lazy import LazyModule
+from utils.logger import configure_logging, log_event
+from utils.metrics_buffer import MetricsRingBuffer
+from utils.system import SensorHub, sensors as default_sensors
+
+# Loaded on first use, so commands that only read rules skip them
+futures = LazyModule("concurrent.futures")
+sqlite3 = LazyModule("sqlite3")
+
+
+_INSERT_EXECUTION = """
+    INSERT INTO executions
+        (rule_name, timestamp, success, execution_time, trigger_type, error_message)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+_INSERT_METRICS = """
+    INSERT INTO system_metrics
+        (timestamp, cpu_percent, memory_percent, battery_percent, network_bytes_per_sec)
+    VALUES (?, ?, ?, ?, ?)
+"""
+_UPDATE_PERFORMANCE = """
+    INSERT OR REPLACE INTO rule_performance
+        (rule_name, total_executions, successful_executions,
+         avg_execution_time, last_execution)
+    SELECT rule_name, SUM(executions), SUM(successes), SUM(total_time) / SUM(executions),
+           (SELECT MAX(timestamp) FROM executions WHERE rule_name = ?1)
+    FROM rule_stats_daily
+    WHERE rule_name = ?1
+    GROUP BY rule_name
+"""
+
+# Rollup granularities: table suffix -> length of the ISO timestamp prefix
+# used as bucket key ("2025-06-16T10" hourly, "2025-06-16" daily)
+ROLLUP_PERIODS = {"hourly": 13, "daily": 10}
+METRIC_COLUMNS = {
+    "cpu": "cpu_percent",
+    "memory": "memory_percent",
+    "battery": "battery_percent",
+    "network": "network_bytes_per_sec",
+}
+
+
+def _metric_rollup_statements(period: str, bucket: str) -> list[str]:
+    """Create ``metric_stats_<period>``, its trigger, and backfill it
+    
+    *bucket* is an SQL expression of ``{ts}``, the sample's timestamp.
+    """
+    table = f"metric_stats_{period}"
+    metric_updates = "".join(f"""
+                INSERT INTO {table} (bucket, metric, samples, total, min_value, max_value)
+                SELECT {bucket.format(ts="NEW.timestamp")}, '{metric}', 1,
+                       NEW.{column}, NEW.{column}, NEW.{column}
+                WHERE NEW.{column} IS NOT NULL
+                ON CONFLICT (bucket, metric) DO UPDATE SET
+                    samples = samples + 1,
+                    total = total + excluded.total,
+                    min_value = min(min_value, excluded.min_value),
+                    max_value = max(max_value, excluded.max_value);"""
+        for metric, column in METRIC_COLUMNS.items()
+    )
+    statements = [
+        f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            bucket TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            samples INTEGER NOT NULL,
+            total REAL NOT NULL,
+            min_value REAL NOT NULL,
+            max_value REAL NOT NULL,
+            PRIMARY KEY (bucket, metric)
+        ) WITHOUT ROWID
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS system_metrics_rollup_{period}
+        AFTER INSERT ON system_metrics
+        BEGIN{metric_updates}
+        END
+        """,
+    ]
+    statements += [
+        f"""
+        INSERT OR IGNORE INTO {table} (bucket, metric, samples, total, min_value, max_value)
+        SELECT {bucket.format(ts="timestamp")}, '{metric}', COUNT({column}),
+               SUM({column}), MIN({column}), MAX({column})
+        FROM system_metrics
+        WHERE {column} IS NOT NULL
+        GROUP BY 1
+        """
+        for metric, column in METRIC_COLUMNS.items()
+    ]
+    return statements
+
+
+def _rollup_statements() -> list[str]:
+    """Schema version 1: rollup tables kept current by triggers, and indexes"""
+    statements = [
+        "CREATE INDEX IF NOT EXISTS idx_executions_timestamp"
+        " ON executions (timestamp, rule_name, success, execution_time)",
+        "CREATE INDEX IF NOT EXISTS idx_executions_rule"
+        " ON executions (rule_name, timestamp, success, execution_time)",
+        "CREATE INDEX IF NOT EXISTS idx_system_metrics_timestamp ON system_metrics (timestamp)",
+    ]
+    for period, width in ROLLUP_PERIODS.items():
+        statements += [
+            f"""
+            CREATE TABLE IF NOT EXISTS rule_stats_{period} (
+                rule_name TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                executions INTEGER NOT NULL,
+                successes INTEGER NOT NULL,
+                total_time REAL NOT NULL,
+                max_time REAL NOT NULL,
+                PRIMARY KEY (rule_name, bucket)
+            ) WITHOUT ROWID
+            """,
+            f"CREATE INDEX IF NOT EXISTS idx_rule_stats_{period}_bucket"
+            f" ON rule_stats_{period} (bucket, rule_name, executions, successes, total_time)",
+            f"""
+            CREATE TRIGGER IF NOT EXISTS executions_rollup_{period}
+            AFTER INSERT ON executions
+            BEGIN
+                INSERT INTO rule_stats_{period}
+                    (rule_name, bucket, executions, successes, total_time, max_time)
+                VALUES (NEW.rule_name, substr(NEW.timestamp, 1, {width}), 1, NEW.success,
+                        COALESCE(NEW.execution_time, 0), COALESCE(NEW.execution_time, 0))
+                ON CONFLICT (rule_name, bucket) DO UPDATE SET
+                    executions = executions + 1,
+                    successes = successes + excluded.successes,
+                    total_time = total_time + excluded.total_time,
+                    max_time = max(max_time, excluded.max_time);
+            END
+            """,
+            f"""
+            INSERT OR IGNORE INTO rule_stats_{period}
+                (rule_name, bucket, executions, successes, total_time, max_time)
+            SELECT rule_name, substr(timestamp, 1, {width}), COUNT(*), SUM(success),
+                   TOTAL(execution_time), COALESCE(MAX(execution_time), 0)
+            FROM executions
+            GROUP BY 1, 2
+            """,
+        ]
+        statements += _metric_rollup_statements(period, f"substr({{ts}}, 1, {width})")
+    return statements
+
+
+# "2025-06-16T10:35" for any sample taken from 10:35:00 to 10:39:59
+FIVE_MINUTE_BUCKET = "substr({ts}, 1, 14) || printf('%02d', CAST(substr({ts}, 15, 2) AS INTEGER) / 5 * 5)"
+
+
+def _five_minute_statements() -> list[str]:
+    """Schema version 2: five-minute metric rollups for the retention policy"""
+    return _metric_rollup_statements("5min", FIVE_MINUTE_BUCKET)
+
+
+# Migration N brings the database from user_version N to N + 1
+MIGRATIONS = [_rollup_statements, _five_minute_statements]
+
+
+class RetentionPolicy:
+    """How long each resolution of the system metrics series is kept
+    
+    Raw ``system_metrics`` rows are kept for ``raw_days``, five-minute
+    rollups for ``five_minute_days`` and hourly rollups for ``hourly_days``
+    (None keeps them forever); daily rollups are never dropped. Every
+    resolution is written by triggers at insert time, so compaction only
+    deletes rows past their horizon. It does so in transactions of at most
+    ``batch_size`` rows, stops after ``max_batches`` and then returns
+    ``vacuum_pages`` free pages to the file system.
+    """
+    
+    def __init__(self, raw_days: float = 7, five_minute_days: float | None = 90,
+                 hourly_days: float | None = None, interval: float = 3600,
+                 batch_size: int = 5000, max_batches: int = 20, vacuum_pages: int = 1000):
+        self.raw_days = raw_days
+        self.five_minute_days = five_minute_days
+        self.hourly_days = hourly_days
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.vacuum_pages = vacuum_pages
+        
+    @classmethod
+    def from_config(cls, config: "ConfigurationManager") -> "RetentionPolicy":
+        return cls(
+            raw_days=config.get("metrics_raw_days", 7),
+            five_minute_days=config.get("metrics_five_minute_days", 90),
+            hourly_days=config.get("metrics_hourly_days"),
+            interval=config.get("metrics_compaction_interval", 3600),
+            batch_size=config.get("metrics_compaction_batch", 5000),
+        )
+        
+    def _targets(self, now: datetime) -> list[tuple[str, str]]:
+        """Return (delete statement, cutoff) for every bounded resolution"""
+        targets = []
+        if self.raw_days is not None:
+            cutoff = (now - timedelta(days=self.raw_days)).isoformat()
+            targets.append(("""
+                DELETE FROM system_metrics WHERE id IN (
+                    SELECT id FROM system_metrics WHERE timestamp < ? ORDER BY timestamp LIMIT ?
+                )
+            """, cutoff))
+        for table, days, width in (("metric_stats_5min", self.five_minute_days, 16),
+                                   ("metric_stats_hourly", self.hourly_days, 13)):
+            if days is not None:
+                cutoff = (now - timedelta(days=days)).isoformat()[:width]
+                targets.append((f"""
+                    DELETE FROM {table} WHERE (bucket, metric) IN (
+                        SELECT bucket, metric FROM {table} WHERE bucket < ? ORDER BY bucket LIMIT ?
+                    )
+                """, cutoff))
+        return targets
+        
+    def compact(self, conn: sqlite3.Connection, now: datetime | None = None) -> bool:
+        """Run one bounded compaction pass; return True if work is left"""
+        if now is None:
+            now = datetime.now()
+        batches = 0
+        for statement, cutoff in self._targets(now):
+            while batches < self.max_batches:
+                with conn:
+                    deleted = conn.execute(statement, (cutoff, self.batch_size)).rowcount
+                batches += 1
+                if deleted < self.batch_size:
+                    break
+            else:
+                return True
+        conn.execute(f"PRAGMA incremental_vacuum({int(self.vacuum_pages)})").fetchall()
+        return False
+
+
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+
+def connect_analytics(db_path: Path, synchronous: str = "NORMAL") -> sqlite3.Connection:
+    """Open the analytics database with the pragmas every connection needs
+    
+    ``NORMAL`` is durable across application crashes in WAL mode; only a
+    power loss can drop the last commits.
+    """
+    if synchronous.upper() not in SYNCHRONOUS_MODES:
+        raise ValueError(f"Invalid synchronous mode '{synchronous}'")
+    conn = sqlite3.connect(db_path, timeout=10.0, check_same_thread=False)
+    conn.execute(f"PRAGMA synchronous={synchronous.upper()}")
+    return conn
+
+
+class AnalyticsWriter:
+    """Writes analytics rows from a queue on a dedicated thread
+    
+    Producers only enqueue. Every ``flush_interval`` seconds (or when asked
+    to flush) the writer drains the queue and stores everything in one
+    transaction: executions and metrics with ``executemany``, then one
+    ``rule_performance`` refresh per rule touched by the batch.
+    """
+    
+    def __init__(self, db_path: Path, flush_interval: float = 1.0,
+                 synchronous: str = "NORMAL", retention: RetentionPolicy = None,
+                 on_executions=None):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.synchronous = synchronous
+        self.retention = retention
+        # Called after a batch containing executions is committed
+        self.on_executions = on_executions
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="appflow-analytics", daemon=True)
+        self._thread.start()
+        
+    def put(self, kind: str, row: tuple):
+        self._queue.put((kind, row))
+        
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything queued so far is committed"""
+        done = threading.Event()
+        self._queue.put((None, done))
+        self._wake.set()
+        return done.wait(timeout)
+        
+    def close(self):
+        """Commit the queue and stop the writer thread"""
+        self._stopping = True
+        self._wake.set()
+        self._thread.join(timeout=5.0)
+        
+    def _run(self):
+        conn = connect_analytics(self.db_path, self.synchronous)
+        next_compaction = time.monotonic()
+        try:
+            while True:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                self._drain(conn)
+                if self._stopping:
+                    self._drain(conn)
+                    return
+                if self.retention is not None and time.monotonic() >= next_compaction:
+                    next_compaction = time.monotonic() + self._compact(conn)
+        finally:
+            conn.close()
+            
+    def _compact(self, conn: sqlite3.Connection) -> float:
+        """Run one retention pass; return the delay before the next one"""
+        try:
+            more = self.retention.compact(conn)
+        except sqlite3.Error as e:
+            print(f"Error compacting analytics: {e}")
+            return self.retention.interval
+        # Queued rows get written between passes over a large backlog
+        return 0 if more else self.retention.interval
+            
+    def _drain(self, conn: sqlite3.Connection):
+        executions, metrics, rules, waiters = [], [], {}, []
+        while True:
+            try:
+                kind, row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "execution":
+                executions.append(row)
+            elif kind == "metrics":
+                metrics.append(row)
+            elif kind == "performance":
+                rules[row] = None
+            else:
+                waiters.append(row)
+                
+        if executions or metrics or rules:
+            try:
+                with conn:
+                    conn.executemany(_INSERT_EXECUTION, executions)
+                    conn.executemany(_INSERT_METRICS, metrics)
+                    conn.executemany(_UPDATE_PERFORMANCE, list(rules))
+            except sqlite3.Error as e:
+                print(f"Error writing analytics: {e}")
+            else:
+                if executions and self.on_executions is not None:
+                    self.on_executions()
+                
+        for waiter in waiters:
+            waiter.set()
+
+
+class AnalyticsManager:
+    """Stores rule executions and system metrics in a SQLite database
+    
+    The database runs in WAL mode so readers never block the writer. After
+    :meth:`start_writer` the ``record_*`` methods only enqueue and an
+    :class:`AnalyticsWriter` thread commits them in batches; before that
+    they write directly. ``version`` changes whenever committed executions
+    make earlier query results stale.
+    """
+    
+    def __init__(self, db_path: Path = None, synchronous: str = "NORMAL",
+                 retention: RetentionPolicy = None):
+        if db_path is None:
+            db_path = Path(__file__).parent / "analytics.db"
+        
+        self.db_path = Path(db_path)
+        self.synchronous = synchronous
+        self.retention = retention
+        self.writer = None
+        self._versions = itertools.count(1)
+        self.version = 0
+        self.init_database()
+        
+    def _connect(self) -> sqlite3.Connection:
+        return connect_analytics(self.db_path, self.synchronous)
+        
+    def start_writer(self, flush_interval: float = 1.0):
+        """Route writes through a background :class:`AnalyticsWriter`"""
+        if self.writer is None:
+            self.writer = AnalyticsWriter(
+                self.db_path, flush_interval, self.synchronous, self.retention,
+                on_executions=self._executions_changed,
+            )
+            
+    def flush(self):
+        """Wait until all queued analytics rows are committed"""
+        if self.writer is not None:
+            self.writer.flush()
+            
+    def close(self):
+        """Commit queued rows and return to direct writes"""
+        writer, self.writer = self.writer, None
+        if writer is not None:
+            writer.close()
+            
+    def compact_metrics(self, now: datetime = None):
+        """Apply the retention policy until nothing is left to delete"""
+        retention = self.retention or RetentionPolicy()
+        with closing(self._connect()) as conn:
+            while retention.compact(conn, now):
+                pass
+            
+    def _executions_changed(self):
+        self.version = next(self._versions)
+            
+    def _write(self, kind: str, sql: str, row: tuple):
+        writer = self.writer
+        if writer is not None:
+            writer.put(kind, row)
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.execute(sql, row)
+        if kind == "execution":
+            self._executions_changed()
+        
+    def init_database(self):
+        """Create analytics tables if they don't exist"""
+        with closing(self._connect()) as conn, conn:
+            # Let compaction hand freed pages back; an existing database
+            # needs one full VACUUM to switch
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+            # WAL is persistent, so setting it once covers every connection
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS executions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    rule_name TEXT NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    success INTEGER NOT NULL,
+                    execution_time REAL,
+                    trigger_type TEXT,
+                    error_message TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS system_metrics (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    cpu_percent REAL,
+                    memory_percent REAL,
+                    battery_percent REAL,
+                    network_bytes_per_sec REAL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rule_performance (
+                    rule_name TEXT PRIMARY KEY,
+                    total_executions INTEGER,
+                    successful_executions INTEGER,
+                    avg_execution_time REAL,
+                    last_execution TEXT
+                )
+            """)
+            self._migrate(conn)
+            
+    def _migrate(self, conn: sqlite3.Connection):
+        """Apply pending schema migrations, building rollups from existing rows"""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            conn.execute("BEGIN")
+            for statement in migration():
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+            
+    def record_execution(self, rule_name: str, success: bool, execution_time: float,
+                         trigger_type: str = None, error_message: str = None):
+        """Record a single rule execution"""
+        self._write("execution", _INSERT_EXECUTION, (
+            rule_name, datetime.now().isoformat(), int(success),
+            execution_time, trigger_type, error_message,
+        ))
+            
+    def record_system_metrics(self, cpu: float, memory: float, battery: float = None,
+                              network: float = None):
+        """Record a system metrics sample"""
+        self._write("metrics", _INSERT_METRICS,
+                    (datetime.now().isoformat(), cpu, memory, battery, network))
+            
+    def update_rule_performance(self, rule_name: str):
+        """Refresh the aggregated performance row for a rule"""
+        self._write("performance", _UPDATE_PERFORMANCE, (rule_name,))
+            
+    def get_analytics_data(self, period: str = "week") -> Dict[str, Any]:
+        """Return aggregated analytics for the given period
+        
+        Served from the rollup tables: hourly rollups for day/week/month
+        (the period starts at the beginning of its first hour) and daily
+        rollups for all history.
+        """
+        periods = {"day": 1, "week": 7, "month": 30}
+        if period in periods:
+            start_date = (datetime.now() - timedelta(days=periods[period])).isoformat()
+            rollup = "hourly"
+        else:
+            start_date = datetime.min.isoformat()
+            rollup = "daily"
+        start_bucket = start_date[:ROLLUP_PERIODS[rollup]]
+        start_hour = start_date[:ROLLUP_PERIODS["hourly"]]
+            
+        with closing(self._connect()) as conn:
+            # Get per-rule execution statistics
+            execution_stats = conn.execute(f"""
+                SELECT 
+                    SUM(executions) as total,
+                    SUM(total_time) / SUM(executions) as avg_time,
+                    CAST(SUM(successes) AS REAL) / SUM(executions) as success_rate,
+                    rule_name
+                FROM rule_stats_{rollup}
+                WHERE bucket >= ?
+                GROUP BY rule_name
+                ORDER BY total DESC
+            """, (start_bucket,)).fetchall()
             
             # Get system metrics
-            system_stats = conn.execute("""
+            metric_rows = conn.execute(f"""
                 SELECT 
-                    AVG(cpu_percent) as avg_cpu,
-                    AVG(memory_percent) as avg_memory,
-                    AVG(battery_percent) as avg_battery,
-                    AVG(network_bytes_per_sec) as avg_network
-                FROM system_metrics 
-                WHERE timestamp >= ?
-            """, (start_date,)).fetchone()
+                    metric,
+                    SUM(total) / SUM(samples) as average,
+                    MIN(min_value) as minimum,
+                    MAX(max_value) as maximum
+                FROM metric_stats_{rollup}
+                WHERE bucket >= ?
+                GROUP BY metric
+            """, (start_bucket,)).fetchall()
+            metrics = {row[0]: row[1:] for row in metric_rows}
+            system_stats = tuple(
+                metrics.get(metric, (None,))[0] for metric in METRIC_COLUMNS
+            )
+            system_ranges = {
+                metric: {"min": values[1], "avg": values[0], "max": values[2]}
+                for metric, values in metrics.items()
+            }
             
             # Get hourly execution counts for chart
             hourly_data = conn.execute("""
                 SELECT 
-                    strftime('%H', timestamp) as hour,
-                    COUNT(*) as count
-                FROM executions 
-                WHERE timestamp >= ?
-                GROUP BY strftime('%H', timestamp)
+                    substr(bucket, 12, 2) as hour,
+                    SUM(executions) as count
+                FROM rule_stats_hourly
+                WHERE bucket >= ?
+                GROUP BY hour
                 ORDER BY hour
-            """, (start_date,)).fetchall()
+            """, (start_hour,)).fetchall()
             
             return {
                 "execution_stats": execution_stats,
                 "system_stats": system_stats,
+                "system_ranges": system_ranges,
                 "hourly_data": hourly_data,
                 "period": period
             }
 
 
 class PerformanceMonitor:
-    """Monitors system performance and rule execution metrics"""
+    """Monitors system performance and rule execution metrics
     
-    def __init__(self, analytics_manager: AnalyticsManager):
+    Every ``sample_interval`` seconds a sample goes into ``history``, an
+    in-memory ring buffer for live views, and is published as a
+    ``metrics`` event; every ``interval`` seconds the latest sample is also
+    stored in the analytics database.
+    """
+    
+    def __init__(self, analytics_manager: AnalyticsManager, sensors: SensorHub = None,
+                 history_size: int = 720, events: EventBus = None):
         self.analytics = analytics_manager
+        self.sensors = sensors if sensors is not None else default_sensors
+        self.events = events if events is not None else default_bus
+        self.history = MetricsRingBuffer(history_size)
         self.monitoring = False
         self.monitor_thread = None
-        self.metrics_queue = queue.Queue()
         
-    def start_monitoring(self, interval: float = 30.0):
+    def start_monitoring(self, interval: float = 30.0, sample_interval: float = 5.0):
         """Start performance monitoring in background thread"""
         if self.monitoring:
             return
@@ -49,7 +593,7 @@ class PerformanceMonitor:
         self.monitoring = True
         self.monitor_thread = threading.Thread(
             target=self._monitor_loop,
-            args=(interval,),
+            args=(interval, sample_interval),
             daemon=True
         )
         self.monitor_thread.start()
@@ -60,41 +604,82 @@ class PerformanceMonitor:
         if self.monitor_thread:
             self.monitor_thread.join(timeout=5.0)
             
-    def _monitor_loop(self, interval: float):
+    def sample(self) -> tuple:
+        """Read the sensors once and append the reading to ``history``"""
+        # Collect system metrics from the shared sensor cache
+        cpu = self.sensors.cpu_percent()
+        memory = self.sensors.memory_percent()
+        battery = self.sensors.battery_percent()
+        network = self.sensors.network_bytes_per_sec()
+        self.history.append(cpu, memory, battery, network)
+        self.events.publish("metrics", cpu=cpu, memory=memory, battery=battery, network=network)
+        return cpu, memory, battery, network
+        
+    def _monitor_loop(self, interval: float, sample_interval: float):
         """Main monitoring loop"""
+        sample_interval = min(sample_interval, interval)
+        next_record = time.monotonic()
         while self.monitoring:
             try:
-                # Collect system metrics
-                cpu = get_cpu_percent(interval=0.1)
-                memory = psutil.virtual_memory().percent
-                battery = get_battery_percent()
-                network = get_network_bytes_per_sec()
+                metrics = self.sample()
                 
                 # Record metrics
-                self.analytics.record_system_metrics(cpu, memory, battery, network)
-                
-                # Sleep for specified interval
-                time.sleep(interval)
-                
+                if time.monotonic() >= next_record:
+                    self.analytics.record_system_metrics(*metrics)
+                    next_record = max(next_record + interval, time.monotonic())
+                    
             except Exception as e:
                 print(f"Error in performance monitoring: {e}")
-                time.sleep(interval)
+                
+            # Sleep for specified interval
+            time.sleep(sample_interval)
+
+
+class RuleExecution:
+    """Book-keeping for one rule execution running on the worker pool"""
+    
+    def __init__(self, rule, trigger_type: str):
+        self.rule = rule
+        self.trigger_type = trigger_type
+        # Set when a worker picks the execution up
+        self.started = None
+        self.cancel = threading.Event()
+        self.timed_out = False
+        self.future = None
 
 
 class EnhancedRuleEngine(RuleEngine):
-    """Enhanced rule engine with analytics and performance monitoring"""
+    """Enhanced rule engine with analytics and performance monitoring
+    
+    Rule executions run on a bounded thread pool of ``max_concurrent_rules``
+    workers. An execution still running ``rule_timeout`` seconds after a
+    worker started it is recorded as a timeout and asked to stop at its
+    next action; time spent queued does not count.
+    """
     
     def __init__(self, rules, poll_interval: float = 2.0, log_path=None, 
-                 run_once: bool = False, analytics_manager: AnalyticsManager = None):
-        super().__init__(rules, poll_interval, log_path, run_once)
+                 run_once: bool = False, analytics_manager: AnalyticsManager = None,
+                 sensors: SensorHub = None, max_concurrent_rules: int = 10,
+                 rule_timeout: float = 30, analytics_flush_interval: float = 1.0):
+        super().__init__(rules, poll_interval, log_path, run_once, sensors)
         self.analytics = analytics_manager or AnalyticsManager()
-        self.performance_monitor = PerformanceMonitor(self.analytics)
+        self.analytics_flush_interval = analytics_flush_interval
+        self.performance_monitor = PerformanceMonitor(self.analytics, self.sensors)
         self.rule_stats = {}
+        self.rule_timeout = rule_timeout
+        self.executor = futures.ThreadPoolExecutor(
+            max_workers=max_concurrent_rules, thread_name_prefix="appflow-rule"
+        )
+        self._in_flight: Dict[Any, RuleExecution] = {}
+        self._in_flight_lock = threading.Lock()
         
     def run(self):
         """Enhanced run method with analytics"""
         log_event("Enhanced rule engine started", self.log_path)
         
+        # Keep analytics writes off the engine and worker threads
+        self.analytics.start_writer(self.analytics_flush_interval)
+        
         # Start performance monitoring
         self.performance_monitor.start_monitoring()
         
@@ -102,50 +687,124 @@ class EnhancedRuleEngine(RuleEngine):
             while True:
                 start_time = time.time()
                 
-                for rule in self.rules:
-                    if rule.check_triggers():
-                        self._execute_rule_with_analytics(rule)
+                context, candidates = self._begin_cycle()
+                for rule in candidates:
+                    if rule.check_triggers(context):
+                        self._execute_rule_with_analytics(rule, context.processes)
+                self._check_timeouts()
                         
                 if self.run_once:
+                    self._drain()
                     break
                     
                 # Record engine cycle time
                 cycle_time = time.time() - start_time
-                if cycle_time < self.poll_interval:
-                    time.sleep(self.poll_interval - cycle_time)
+                time.sleep(self._idle_time(cycle_time))
                     
         except KeyboardInterrupt:
             print("Enhanced rule engine stopped")
         finally:
             self.performance_monitor.stop_monitoring()
+            self._cancel_all()
+            self.executor.shutdown(wait=False)
+            self.analytics.flush()
             log_event("Enhanced rule engine stopped", self.log_path)
             
-    def _execute_rule_with_analytics(self, rule):
-        """Execute rule and record analytics"""
-        rule_name = rule.name
-        start_time = time.time()
+    def _execute_rule_with_analytics(self, rule, processes=None):
+        """Queue rule on the worker pool; analytics are recorded when it ends
+        
+        Returns False when the rule is already running and was not queued.
+        """
+        with self._in_flight_lock:
+            if rule in self._in_flight:
+                return False
+            execution = RuleExecution(rule, self._get_trigger_type(rule))
+            self._in_flight[rule] = execution
+            
+        execution.future = self.executor.submit(self._run_execution, execution, processes)
+        return True
+        
+    def _run_execution(self, execution: RuleExecution, processes=None):
+        """Worker body: execute the rule and record its outcome"""
+        rule_name = execution.rule.name
         success = True
         error_message = None
-        trigger_type = self._get_trigger_type(rule)
+        with self._in_flight_lock:
+            execution.started = time.time()
         
         try:
             # Execute the rule
-            rule.execute(log_path=self.log_path)
+            execution.rule.execute(
+                log_path=self.log_path, processes=processes, cancel=execution.cancel
+            )
             
         except Exception as e:
             success = False
             error_message = str(e)
-            log_event(f"Error executing rule {rule_name}: {e}", self.log_path)
+            log_event(f"Error executing rule {rule_name}: {e}", self.log_path,
+                      event="error", rule=rule_name)
             
         finally:
-            # Record execution analytics
-            execution_time = time.time() - start_time
-            self.analytics.record_execution(
-                rule_name, success, execution_time, trigger_type, error_message
+            with self._in_flight_lock:
+                self._in_flight.pop(execution.rule, None)
+                timed_out = execution.timed_out
+            # A timed-out execution has already been recorded
+            if not timed_out:
+                self._record_execution(
+                    execution, success, time.time() - execution.started, error_message
+                )
+                
+    def _record_execution(self, execution: RuleExecution, success: bool,
+                          execution_time: float, error_message: str = None):
+        """Record execution analytics and refresh the rule's performance stats"""
+        rule_name = execution.rule.name
+        self.analytics.record_execution(
+            rule_name, success, execution_time, execution.trigger_type, error_message
+        )
+        
+        # Update rule performance stats
+        self.analytics.update_rule_performance(rule_name)
+        
+    def _check_timeouts(self):
+        """Record executions running past ``rule_timeout`` and cancel them
+        
+        Executions still waiting for a free worker have not started and
+        cannot time out.
+        """
+        now = time.time()
+        with self._in_flight_lock:
+            expired = [
+                e for e in self._in_flight.values()
+                if not e.timed_out and e.started is not None
+                and now - e.started > self.rule_timeout
+            ]
+            for execution in expired:
+                execution.timed_out = True
+                execution.cancel.set()
+                
+        for execution in expired:
+            log_event(
+                f"Rule {execution.rule.name} timed out after {self.rule_timeout}s",
+                self.log_path, event="timeout", rule=execution.rule.name,
+                duration=now - execution.started,
+            )
+            self._record_execution(
+                execution, False, now - execution.started,
+                f"Timed out after {self.rule_timeout}s",
             )
             
-            # Update rule performance stats
-            self.analytics.update_rule_performance(rule_name)
+    def _drain(self):
+        """Wait for in-flight executions, up to ``rule_timeout``"""
+        with self._in_flight_lock:
+            pending = [e.future for e in self._in_flight.values() if e.future]
+        futures.wait(pending, timeout=self.rule_timeout)
+        self._check_timeouts()
+        
+    def _cancel_all(self):
+        """Ask every in-flight execution to stop"""
+        with self._in_flight_lock:
+            for execution in self._in_flight.values():
+                execution.cancel.set()
             
     def _get_trigger_type(self, rule) -> str:
         """Get the primary trigger type for analytics"""
@@ -189,7 +848,21 @@ class ConfigurationManager:
             "backup_frequency_hours": 24,
             "auto_suggestions": True,
             "theme": "dark",
-            "notifications_enabled": True
+            "notifications_enabled": True,
+            "log_flush_interval": 0.5,
+            "log_fsync": False,
+            "analytics_flush_interval": 1.0,
+            "analytics_synchronous": "NORMAL",
+            "metrics_raw_days": 7,
+            "metrics_five_minute_days": 90,
+            "metrics_hourly_days": None,
+            "metrics_compaction_interval": 3600,
+            "metrics_compaction_batch": 5000,
+            "api_max_workers": 8,
+            "api_request_timeout": 10.0,
+            "api_cache_ttl": {},
+            "api_event_queue_size": 256,
+            "api_max_streams": 4
         }
         
         try:
@@ -220,129 +893,6 @@ class ConfigurationManager:
         self.save_config()
 
 
-class APIServer:
-    """Simple HTTP API server for external integrations"""
-    
-    def __init__(self, engine: EnhancedRuleEngine, analytics: AnalyticsManager, 
-                 port: int = 8080):
-        self.engine = engine
-        self.analytics = analytics
-        self.port = port
-        self.server_thread = None
-        self.running = False
-        
-    def start(self):
-        """Start API server in background thread"""
-        if self.running:
-            return
-            
-        self.running = True
-        self.server_thread = threading.Thread(
-            target=self._run_server,
-            daemon=True
-        )
-        self.server_thread.start()
-        print(f"API server started on port {self.port}")
-        
-    def stop(self):
-        """Stop API server"""
-        self.running = False
-        if self.server_thread:
-            self.server_thread.join(timeout=5.0)
-            
-    def _run_server(self):
-        """Simple HTTP server implementation"""
-        try:
-            from http.server import HTTPServer, BaseHTTPRequestHandler
-            import json
-            
-            class APIHandler(BaseHTTPRequestHandler):
-                def do_GET(self):
-                    if self.path == "/api/status":
-                        self._send_json_response(200, {
-                            "status": "running",
-                            "engine_stats": self.server.engine.get_engine_stats(),
-                            "timestamp": datetime.now().isoformat()
-                        })
-                    elif self.path == "/api/analytics":
-                        data = self.server.analytics.get_analytics_data("week")
-                        self._send_json_response(200, data)
-                    elif self.path == "/api/rules":
-                        rules_data = [
-                            {
-                                "name": rule.name,
-                                "enabled": rule.enabled,
-                                "triggers": len(rule.triggers),
-                                "actions": len(rule.actions)
-                            }
-                            for rule in self.server.engine.rules
-                        ]
-                        self._send_json_response(200, {"rules": rules_data})
-                    else:
-                        self._send_json_response(404, {"error": "Not found"})
-                        
-                def _send_json_response(self, status_code, data):
-                    self.send_response(status_code)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps(data).encode())
-                    
-                def log_message(self, format, *args):
-                    # Suppress default logging
-                    pass
-            
-            # Attach references to handler
-            APIHandler.server = self
-            
-            server = HTTPServer(('localhost', self.port), APIHandler)
-            server.engine = self.engine
-            server.analytics = self.analytics
-            
-            while self.running:
-                server.handle_request()
-                
-        except Exception as e:
-            print(f"API server error: {e}")
-
-
-def load_rules(profile: str | None = None, rules_dir: Path | None = None) -> list[dict]:
-    """Load YAML rule files from *rules_dir*."""
-    if rules_dir is None:
-        env_dir = os.getenv("APPFLOW_RULES_DIR")
-        rules_dir = Path(env_dir) if env_dir else DEFAULT_RULES_DIR
-
-    files: list[Path] = []
-
-    default_file = rules_dir / "default.yaml"
-    if default_file.exists():
-        files.append(default_file)
-
-    if profile:
-        profile_file = rules_dir / f"{profile}.yaml"
-        if profile_file.exists():
-            files.append(profile_file)
-        profile_dir = rules_dir / profile
-        if profile_dir.is_dir():
-            files.extend(sorted(profile_dir.glob("*.yaml")))
-
-    if not files:
-        return []
-
-    rules: list[dict] = []
-
-    for rule_file in files:
-        try:
-            with open(rule_file, "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f)
-                if isinstance(data, list):
-                    rules.extend(data)
-        except Exception as e:
-            print(f"Error loading {rule_file}: {e}")
-    
-    return rules
-
-
 def export_analytics(analytics_manager: AnalyticsManager, output_path: Path):
     """Export analytics data to JSON file"""
     try:
@@ -399,6 +949,11 @@ def validate_rules(rules: list[dict]) -> list[str]:
                 issues.append(f"{rule_id}: 'triggers' must be a list")
             elif len(rule['triggers']) == 0:
                 issues.append(f"{rule_id}: Empty triggers list")
+            else:
+                try:
+                    compile_triggers(rule['triggers'])
+                except ValueError as e:
+                    issues.append(f"{rule_id}: {e}")
                 
         # Check actions
         if 'actions' in rule:
@@ -450,7 +1005,12 @@ def main(argv=None):
         "--once",
         "-1",
         action="store_true",
-        help="Check rules once and exit",
+        help="Check rules once and exit (app_exit triggers cannot fire)",
+    )
+    parser.add_argument(
+        "--no-watch",
+        action="store_true",
+        help="Don't reload rules when rule files change",
     )
     parser.add_argument(
         "--suggest",
@@ -532,9 +1092,14 @@ def main(argv=None):
             return 1
 
     # Initialize analytics
-    analytics_manager = AnalyticsManager()
+    analytics_manager = AnalyticsManager(
+        synchronous=config_manager.get("analytics_synchronous", "NORMAL"),
+        retention=RetentionPolicy.from_config(config_manager),
+    )
     
     if args.suggest:
+        from utils.workflow_suggestions import generate_suggestions
+
         suggestions = generate_suggestions(log_path=args.log)
         if not suggestions:
             print("No suggestions at this time.")
@@ -588,13 +1153,35 @@ def main(argv=None):
         poll_interval=args.interval,
         log_path=args.log,
         run_once=args.once,
-        analytics_manager=analytics_manager
+        analytics_manager=analytics_manager,
+        max_concurrent_rules=config_manager.get("max_concurrent_rules", 10),
+        rule_timeout=config_manager.get("rule_timeout", 30),
+        analytics_flush_interval=config_manager.get("analytics_flush_interval", 1.0),
     )
+    if not (args.once or args.run or args.no_watch):
+        engine.reloader = RuleFileReloader(engine, args.profile, args.rules_dir)
+    
+    # Log through the background writer; SIGTERM exits normally so the
+    # queued lines are flushed.
+    configure_logging(
+        flush_interval=config_manager.get("log_flush_interval", 0.5),
+        fsync=config_manager.get("log_fsync", False),
+    )
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     
     # Start API server if requested
     api_server = None
     if args.api_server:
-        api_server = APIServer(engine, analytics_manager, args.api_port)
+        from core.api_server import APIServer
+
+        api_server = APIServer(
+            engine, analytics_manager, args.api_port,
+            max_workers=config_manager.get("api_max_workers", 8),
+            request_timeout=config_manager.get("api_request_timeout", 10.0),
+            cache_ttl=config_manager.get("api_cache_ttl"),
+            event_queue_size=config_manager.get("api_event_queue_size", 256),
+            max_streams=config_manager.get("api_max_streams", 4),
+        )
         api_server.start()
     
     try:
@@ -603,6 +1190,7 @@ def main(argv=None):
     finally:
         if api_server:
             api_server.stop()
+        analytics_manager.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+"""In-process publish/subscribe for live engine events.
+
+Every structured :func:`utils.logger.log_event` call (rule starts, actions,
+errors, reloads...) and every metrics sample is published on :data:`bus`.
+Publishing never blocks: each subscriber owns a bounded queue and, once it
+is full, the oldest event is dropped to make room, so a slow reader only
+loses its own backlog.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+
+
+class Subscription:
+    """Bounded, drop-oldest queue of events for one subscriber."""
+
+    def __init__(self, bus: "EventBus", maxsize: int = 256):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self._bus = bus
+        self._events: deque[dict] = deque(maxlen=maxsize)
+        self._ready = threading.Condition()
+        # Events discarded because the subscriber fell behind
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, event: dict) -> None:
+        with self._ready:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+            self._ready.notify()
+
+    def get(self, timeout: float | None = None) -> dict | None:
+        """Return the oldest pending event, or None on timeout or close."""
+        with self._ready:
+            if not self._ready.wait_for(lambda: self._events or self.closed, timeout):
+                return None
+            return self._events.popleft() if self._events else None
+
+    def close(self) -> None:
+        """Stop receiving events and wake a blocked :meth:`get`."""
+        self._bus.unsubscribe(self)
+        with self._ready:
+            self.closed = True
+            self._ready.notify_all()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class EventBus:
+    """Fan-out of events to every current :class:`Subscription`."""
+
+    def __init__(self):
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, maxsize: int = 256) -> Subscription:
+        subscription = Subscription(self, maxsize)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, kind: str, **fields) -> None:
+        """Send an event to all subscribers; fields set to None are left out."""
+        if not self._subscribers:
+            return
+        event = {"event": kind, "timestamp": time.time()}
+        event.update((key, value) for key, value in fields.items() if value is not None)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.put(event)
+
+
+# Shared bus used by the logger, the engine and the API server
+bus = EventBus()
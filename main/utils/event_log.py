@@ -0,0 +1,124 @@
+"""Structured JSON Lines event log with a sparse time index.
+
+A log file whose name ends in ``.jsonl`` receives one JSON record per event
+instead of a free-text line::
+
+    {"ts": 1718524800.0, "event": "action", "rule": "Dev", "action": "launch",
+     "target": "code.exe", "message": "launch -> code.exe"}
+
+Next to it, ``<log>.idx`` holds fixed-size ``(timestamp, byte offset)``
+pairs, one roughly every ``INDEX_STRIDE`` bytes of log. Readers bisect the
+index to seek close to the start of a time range and decode only the
+records after it.
+"""
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Iterator
+
+INDEX_STRIDE = 64 * 1024
+# Records from concurrent writers may be slightly out of order
+_ORDER_SLACK = 60.0
+_INDEX_ENTRY = struct.Struct("<dQ")
+
+
+def is_structured(log_path: Path) -> bool:
+    """Return True if *log_path* should be written as JSON Lines."""
+    return Path(log_path).suffix == ".jsonl"
+
+
+def index_path(log_path: Path) -> Path:
+    log_path = Path(log_path)
+    return log_path.with_name(log_path.name + ".idx")
+
+
+def format_record(ts: float, message: str, event: str | None = None, **fields) -> str:
+    """Return one JSON Lines record; fields that are None are left out."""
+    record = {"ts": ts, "event": event or "message"}
+    record.update((key, value) for key, value in fields.items() if value is not None)
+    record["message"] = message
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def _last_indexed_offset(idx_path: Path) -> int | None:
+    try:
+        with open(idx_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell() - f.tell() % _INDEX_ENTRY.size
+            if size == 0:
+                return None
+            f.seek(size - _INDEX_ENTRY.size)
+            return _INDEX_ENTRY.unpack(f.read(_INDEX_ENTRY.size))[1]
+    except FileNotFoundError:
+        return None
+
+
+def append_records(log_path: Path, lines: list[str], fsync: bool = False) -> None:
+    """Append JSON Lines *lines* to *log_path* and extend its index."""
+    idx_path = index_path(log_path)
+    last_indexed = _last_indexed_offset(idx_path)
+    entries = []
+    with open(log_path, "ab") as f:
+        offset = f.tell()
+        chunks = []
+        for line in lines:
+            data = line.encode("utf-8")
+            if last_indexed is None or offset - last_indexed >= INDEX_STRIDE:
+                entries.append(_INDEX_ENTRY.pack(json.loads(line)["ts"], offset))
+                last_indexed = offset
+            chunks.append(data)
+            offset += len(data)
+        f.write(b"".join(chunks))
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    if entries:
+        with open(idx_path, "ab") as f:
+            f.write(b"".join(entries))
+
+
+def _seek_offset(log_path: Path, start: float | None) -> int:
+    """Return a byte offset at or before the first record with ts >= start."""
+    if start is None:
+        return 0
+    try:
+        data = index_path(log_path).read_bytes()
+    except FileNotFoundError:
+        return 0
+    count = len(data) // _INDEX_ENTRY.size
+    entries = [_INDEX_ENTRY.unpack_from(data, i * _INDEX_ENTRY.size) for i in range(count)]
+    # Last indexed record safely before start, allowing for records that
+    # were written slightly out of order
+    pos = bisect.bisect_left([ts for ts, _ in entries], start - _ORDER_SLACK) - 1
+    return entries[pos][1] if pos >= 0 else 0
+
+
+def read_records(log_path: Path, start: float | None = None, end: float | None = None,
+                 event: str | None = None, action: str | None = None) -> Iterator[dict]:
+    """Yield records with ``start <= ts < end``, optionally filtered by type."""
+    log_path = Path(log_path)
+    if not log_path.exists():
+        return
+    with open(log_path, "rb") as f:
+        f.seek(_seek_offset(log_path, start))
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            ts = record.get("ts", 0)
+            if start is not None and ts < start:
+                continue
+            if end is not None and ts >= end:
+                if ts >= end + _ORDER_SLACK:
+                    break
+                continue
+            if event is not None and record.get("event") != event:
+                continue
+            if action is not None and record.get("action") != action:
+                continue
+            yield record
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+from pathlib import Path
+
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+
+_WATCH_MASK = (
+    IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """Detects changed files by comparing mtimes and sizes between polls."""
+
+    def __init__(self, directories: list[Path], pattern: str = "*.yaml"):
+        self.directories = [Path(d) for d in directories]
+        self.pattern = pattern
+        self._state = self._scan()
+
+    def _scan(self) -> dict[Path, tuple[int, int]]:
+        state = {}
+        for directory in self.directories:
+            if not directory.is_dir():
+                continue
+            for path in directory.glob(self.pattern):
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                state[path] = (st.st_mtime_ns, st.st_size)
+        return state
+
+    def changes(self) -> set[Path]:
+        """Return the files added, modified or removed since the last call."""
+        current = self._scan()
+        previous, self._state = self._state, current
+        return {
+            path for path in previous.keys() | current.keys()
+            if previous.get(path) != current.get(path)
+        }
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Linux watcher reading inotify events without blocking."""
+
+    def __init__(self, directories: list[Path], pattern: str = "*.yaml"):
+        self.pattern = pattern
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches: dict[int, Path] = {}
+        for directory in directories:
+            directory = Path(directory)
+            if not directory.is_dir():
+                continue
+            wd = libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+            if wd < 0:
+                self.close()
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+            self._watches[wd] = directory
+
+    def changes(self) -> set[Path]:
+        """Return the files touched since the last call."""
+        changed: set[Path] = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                directory = self._watches.get(wd)
+                if directory is None or mask & IN_IGNORED:
+                    continue
+                if not name:
+                    # The directory itself was deleted
+                    changed.add(directory)
+                    continue
+                path = directory / os.fsdecode(name)
+                if path.match(self.pattern):
+                    changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def watch_directories(directories: list[Path], pattern: str = "*.yaml"):
+    """Return an inotify watcher on Linux, falling back to mtime polling."""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(directories, pattern)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directories, pattern)
@@ -0,0 +1,27 @@
+"""Deferred imports for modules that only some commands need."""
+from __future__ import annotations
+
+import importlib
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access.
+
+    ``psutil = LazyModule("psutil")`` keeps call sites, and ``mock.patch``
+    targets such as ``utils.system.psutil.cpu_percent``, unchanged while a
+    command that never touches the module skips its import cost.
+    """
+
+    def __init__(self, name: str):
+        self.__name = name
+        self.__module = None
+
+    def __getattr__(self, attr):
+        module = self.__module
+        if module is None:
+            # import_module holds the import lock, so racing threads import once
+            module = self.__module = importlib.import_module(self.__name)
+        return getattr(module, attr)
+
+    def __repr__(self):
+        return f"<lazy module {self.__name!r}>"
@@ -1,20 +1,161 @@
 from __future__ import annotations
 
+import atexit
+import os
+import queue
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 
+from utils.event_bus import bus
+from utils.event_log import append_records, format_record, is_structured
 
-def log_event(message: str, log_path: Path | str | None = None) -> None:
-    """Append a timestamped message to the log file."""
-    if log_path is None:
-        log_path = Path(__file__).resolve().parent.parent / "appflow.log"
-    else:
-        log_path = Path(log_path)
 
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+DEFAULT_LOG_PATH = Path(__file__).resolve().parent.parent / "appflow.log"
+
+
+class BackgroundLogWriter:
+    """Writes log lines from a queue on a dedicated thread.
+
+    Callers only enqueue. The writer wakes every ``flush_interval`` seconds
+    (or when asked to flush), drains everything queued and appends it with
+    one open/write/close per log file. With ``fsync`` each batch is also
+    forced to disk.
+    """
+
+    def __init__(self, flush_interval: float = 0.5, fsync: bool = False):
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="appflow-log", daemon=True)
+        self._thread.start()
+
+    def write(self, log_path: Path, line: str) -> None:
+        self._queue.put((log_path, line))
+
+    def flush(self, timeout: float | None = 5.0) -> bool:
+        """Block until everything queued so far is written."""
+        done = threading.Event()
+        self._queue.put((None, done))
+        self._wake.set()
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """Write out the queue and stop the writer thread."""
+        self._stopping = True
+        self._wake.set()
+        self._thread.join(timeout=5.0)
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._drain()
+            if self._stopping:
+                self._drain()
+                return
+
+    def _drain(self) -> None:
+        pending: dict[Path, list[str]] = {}
+        waiters = []
+        while True:
+            try:
+                log_path, item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if log_path is None:
+                waiters.append(item)
+            else:
+                pending.setdefault(log_path, []).append(item)
+
+        for log_path, lines in pending.items():
+            _append(log_path, lines, self.fsync)
+
+        for waiter in waiters:
+            waiter.set()
+
+
+_writer: BackgroundLogWriter | None = None
+
+
+def configure_logging(background: bool = True, flush_interval: float = 0.5,
+                      fsync: bool = False) -> None:
+    """Switch :func:`log_event` between direct and background writing.
+
+    Background writing is flushed automatically at interpreter exit.
+    """
+    global _writer
+    shutdown_logging()
+    if background:
+        _writer = BackgroundLogWriter(flush_interval, fsync)
+
+
+def flush_logs() -> None:
+    """Wait until all queued log lines are on disk."""
+    if _writer is not None:
+        _writer.flush()
+
+
+def shutdown_logging() -> None:
+    """Flush and stop the background writer, returning to direct writes."""
+    global _writer
+    writer, _writer = _writer, None
+    if writer is not None:
+        writer.close()
+
+
+atexit.register(shutdown_logging)
+
+
+def _append(log_path: Path, lines: list[str], fsync: bool = False) -> None:
     try:
+        if is_structured(log_path):
+            append_records(log_path, lines, fsync)
+            return
         with open(log_path, "a", encoding="utf-8") as f:
-            f.write(f"[{timestamp}] {message}\n")
+            f.write("".join(lines))
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
     except Exception:
         # If logging fails, silently ignore to not break workflow
         pass
+
+
+def log_event(message: str, log_path: Path | str | None = None, *,
+              event: str | None = None, rule: str | None = None,
+              action: str | None = None, target=None,
+              duration: float | None = None) -> None:
+    """Append a timestamped message to the log file.
+
+    The keyword fields are only written to structured (``.jsonl``) logs;
+    plain text logs keep the ``[timestamp] message`` format. Messages with
+    an ``event`` kind are also published on the live event bus.
+    """
+    if event is not None:
+        bus.publish(event, message=message, rule=rule, action=action,
+                    target=target, duration=duration)
+
+    if log_path is None:
+        log_path = DEFAULT_LOG_PATH
+    else:
+        log_path = Path(log_path)
+
+    if is_structured(log_path):
+        line = format_record(
+            time.time(), message, event,
+            rule=rule, action=action, target=target, duration=duration,
+        )
+    else:
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        line = f"[{timestamp}] {message}\n"
+
+    writer = _writer
+    if writer is not None:
+        writer.write(log_path, line)
+        return
+
+    _append(log_path, [line])
@@ -0,0 +1,115 @@
+"""Fixed-capacity in-memory history of system metrics.
+
+Samples live in preallocated typed arrays (``array('d')``), one for the
+timestamps and one per metric, used as a ring: appending overwrites the
+oldest slot and never reallocates. Missing readings (no battery, say) are
+stored as NaN and skipped by the statistics.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from array import array
+
+METRICS = ("cpu", "memory", "battery", "network")
+
+_NAN = float("nan")
+
+
+class MetricsRingBuffer:
+    """Ring buffer of the last ``capacity`` metric samples."""
+
+    def __init__(self, capacity: int = 720):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._timestamps = array("d", bytes(8 * capacity))
+        self._columns = {metric: array("d", [_NAN]) * capacity for metric in METRICS}
+        self._start = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def append(self, cpu: float | None = None, memory: float | None = None,
+               battery: float | None = None, network: float | None = None,
+               timestamp: float | None = None) -> None:
+        """Store one sample, replacing the oldest when full."""
+        if timestamp is None:
+            timestamp = time.time()
+        values = (cpu, memory, battery, network)
+        with self._lock:
+            if self._size < self.capacity:
+                slot = (self._start + self._size) % self.capacity
+                self._size += 1
+            else:
+                slot = self._start
+                self._start = (self._start + 1) % self.capacity
+            self._timestamps[slot] = timestamp
+            for metric, value in zip(METRICS, values):
+                self._columns[metric][slot] = _NAN if value is None else value
+
+    def _slots(self, seconds: float | None, now: float | None) -> range:
+        """Return the logical indexes (0 = oldest) of samples in the window."""
+        if seconds is None or not self._size:
+            return range(self._size)
+        if now is None:
+            now = time.time()
+        timestamps, capacity, start = self._timestamps, self.capacity, self._start
+        cutoff = now - seconds
+        # Timestamps are appended in order, so the window is a suffix
+        low, high = 0, self._size
+        while low < high:
+            middle = (low + high) // 2
+            if timestamps[(start + middle) % capacity] < cutoff:
+                low = middle + 1
+            else:
+                high = middle
+        return range(low, self._size)
+
+    def values(self, metric: str, seconds: float | None = None,
+               now: float | None = None) -> list[float]:
+        """Return the readings of *metric* from the last *seconds*, oldest first."""
+        column = self._columns[metric]
+        with self._lock:
+            slots = self._slots(seconds, now)
+            values = [column[(self._start + i) % self.capacity] for i in slots]
+        return [value for value in values if not math.isnan(value)]
+
+    def latest(self) -> dict | None:
+        """Return the most recent sample, or None when empty."""
+        with self._lock:
+            if not self._size:
+                return None
+            slot = (self._start + self._size - 1) % self.capacity
+            sample = {"timestamp": self._timestamps[slot]}
+            for metric in METRICS:
+                value = self._columns[metric][slot]
+                sample[metric] = None if math.isnan(value) else value
+        return sample
+
+    def stats(self, metric: str, seconds: float | None = None, now: float | None = None,
+              percentiles: tuple[float, ...] = (50, 95)) -> dict:
+        """Return count, min, max, mean and percentiles of *metric* over the window."""
+        values = sorted(self.values(metric, seconds, now))
+        stats = {"count": len(values)}
+        if not values:
+            return stats
+        stats.update(min=values[0], max=values[-1], mean=sum(values) / len(values))
+        for q in percentiles:
+            stats[f"p{q:g}"] = _percentile(values, q)
+        return stats
+
+    def summary(self, seconds: float | None = None, now: float | None = None) -> dict:
+        """Return :meth:`stats` for every metric."""
+        return {metric: self.stats(metric, seconds, now) for metric in METRICS}
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    """Linearly interpolated percentile of an already sorted list."""
+    position = (len(ordered) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
@@ -1,30 +1,94 @@
-import subprocess
-import psutil
 import sys
+import threading
 import time
 import platform
 
+from utils.lazy import LazyModule
+
+# Imported on first use so commands that never read the system skip them
+asyncio = LazyModule("asyncio")
+psutil = LazyModule("psutil")
+subprocess = LazyModule("subprocess")
+
+# A snapshot older than this (seconds) is read again before a kill acts on it
+KILL_SNAPSHOT_MAX_AGE = 1.0
+
 
 def launch_process(cmd):
     """Launch a process with the given command."""
     return subprocess.Popen(cmd, shell=True)
 
 
-def kill_process(name):
-    """Kill all processes with the given name."""
+class ProcessSnapshot:
+    """Name -> PIDs view of the process table, taken in a single pass.
+
+    The table is built lazily on first use, so a poll cycle whose rules never
+    look at processes never walks the process list at all.
+    """
+
+    def __init__(self):
+        self._table: dict[str, list[int]] | None = None
+        self._taken_at = 0.0
+
+    @property
+    def taken(self) -> bool:
+        """Return True once the process table has actually been read."""
+        return self._table is not None
+
+    @property
+    def table(self) -> dict[str, list[int]]:
+        if self._table is None:
+            table: dict[str, list[int]] = {}
+            for p in psutil.process_iter(['pid', 'name']):
+                name = p.info['name']
+                if name:
+                    table.setdefault(name, []).append(p.info['pid'])
+            self._table = table
+            self._taken_at = time.monotonic()
+        return self._table
+
+    def age(self) -> float:
+        """Return the seconds since the table was read (0 if it was not yet)."""
+        if self._table is None:
+            return 0.0
+        return time.monotonic() - self._taken_at
+
+    def pids(self, name: str) -> list[int]:
+        """Return the PIDs of processes called *name*."""
+        return self.table.get(name, [])
+
+    def is_running(self, name: str) -> bool:
+        """Return True if a process called *name* was running."""
+        return name in self.table
+
+
+def kill_process(name, processes: ProcessSnapshot | None = None):
+    """Kill all processes with the given name.
+
+    The PIDs come from *processes* while it is recent. A kill that runs
+    after a ``wait`` or a queue delay reads the table again, so it sees the
+    instances started since. Each PID's name is checked before terminating
+    it, because the PID may have been reused by another process.
+    """
+    if processes is None or processes.age() > KILL_SNAPSHOT_MAX_AGE:
+        processes = ProcessSnapshot()
     killed = False
-    for p in psutil.process_iter(['name']):
-        if p.info['name'] == name:
-            try:
-                p.terminate()
-                killed = True
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
+    for pid in processes.pids(name):
+        try:
+            proc = psutil.Process(pid)
+            if proc.name() != name:
+                continue
+            proc.terminate()
+            killed = True
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
     return killed
 
 
-def is_process_running(name: str) -> bool:
+def is_process_running(name: str, processes: ProcessSnapshot | None = None) -> bool:
     """Check if a process with the given name is currently running."""
+    if processes is not None:
+        return processes.is_running(name)
     for p in psutil.process_iter(['name']):
         if p.info['name'] == name:
             return True
@@ -76,26 +140,151 @@ def get_network_bytes_per_sec() -> float:
         return 0.0
 
 
+class SensorHub:
+    """Cached, non-blocking readings of the system sensors.
+
+    Each sensor is sampled at most once per ``ttl`` seconds no matter how many
+    rules, monitors or API calls ask for it, so sampling cost does not grow
+    with the number of rules. CPU and network figures are deltas since the
+    previous sample rather than blocking measurements.
+    """
+
+    def __init__(self, ttl: float = 1.0, prime: bool = True):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cache: dict[str, tuple[float, float | None]] = {}
+        self._last_net = None
+        self._last_net_time = None
+        self._primed = False
+        if prime:
+            self.prime()
+
+    def prime(self) -> None:
+        """Take the baseline samples the delta-based sensors need, once.
+
+        Done early so the first real read is meaningful.
+        """
+        if not self._primed:
+            self._primed = True
+            self._sample_cpu()
+            self._sample_network()
+
+    def _read(self, name: str, sample) -> float | None:
+        now = time.monotonic()
+        with self._lock:
+            if not self._primed:
+                self.prime()
+            cached = self._cache.get(name)
+            if cached is not None and now - cached[0] < self.ttl:
+                return cached[1]
+            value = sample()
+            self._cache[name] = (now, value)
+            return value
+
+    def _sample_cpu(self) -> float:
+        try:
+            return psutil.cpu_percent(interval=None)
+        except Exception:
+            return 0.0
+
+    def _sample_memory(self) -> float:
+        try:
+            return psutil.virtual_memory().percent
+        except Exception:
+            return 0.0
+
+    def _sample_network(self) -> float:
+        try:
+            now = time.monotonic()
+            net = psutil.net_io_counters()
+        except Exception:
+            return 0.0
+        last, last_time = self._last_net, self._last_net_time
+        self._last_net, self._last_net_time = net, now
+        if last is None or now <= last_time:
+            return 0.0
+        sent = net.bytes_sent - last.bytes_sent
+        recv = net.bytes_recv - last.bytes_recv
+        return (sent + recv) / (now - last_time)
+
+    def cpu_percent(self) -> float:
+        """Return system-wide CPU usage since the previous sample."""
+        return self._read("cpu", self._sample_cpu)
+
+    def memory_percent(self) -> float:
+        """Return the percentage of physical memory in use."""
+        return self._read("memory", self._sample_memory)
+
+    def battery_percent(self) -> float | None:
+        """Return the battery percentage or None if unavailable."""
+        return self._read("battery", get_battery_percent)
+
+    def network_bytes_per_sec(self) -> float:
+        """Return total network throughput since the previous sample."""
+        return self._read("network", self._sample_network)
+
+    def snapshot(self) -> dict:
+        """Return all current readings."""
+        return {
+            "cpu_percent": self.cpu_percent(),
+            "memory_percent": self.memory_percent(),
+            "battery_percent": self.battery_percent(),
+            "network_bytes_per_sec": self.network_bytes_per_sec(),
+        }
+
+
+# Shared hub used by the engine, the performance monitor and the API.
+# Engines prime it, so merely importing this module never loads psutil.
+sensors = SensorHub(prime=False)
+
+
+def _notification_command(message: str) -> list[str] | None:
+    """Return the command showing *message* natively, or None if there is none."""
+    system = platform.system()
+    if system == "Linux":
+        return ["notify-send", "AppFlow", message]
+    if system == "Darwin":  # macOS
+        return [
+            "osascript", "-e", 
+            f'display notification "{message}" with title "AppFlow"'
+        ]
+    return None
+
+
+def _show_toast(message: str) -> None:
+    """Show a Windows toast or fall back to the console."""
+    if platform.system() == "Windows":
+        # Windows toast requires win10toast package; fallback to console
+        try:
+            from win10toast import ToastNotifier
+            ToastNotifier().show_toast("AppFlow", message, duration=5)
+            return
+        except ImportError:
+            pass
+    print(f"[NOTIFY] {message}")
+
+
 def send_notification(message: str) -> None:
     """Display a simple notification to the user (fallback to stdout)."""
     try:
-        system = platform.system()
-        if system == "Linux":
-            subprocess.run(["notify-send", "AppFlow", message], check=False)
-        elif system == "Darwin":  # macOS
-            subprocess.run([
-                "osascript", "-e", 
-                f'display notification "{message}" with title "AppFlow"'
-            ], check=False)
-        elif system == "Windows":
-            # Windows toast requires win10toast package; fallback to console
-            try:
-                from win10toast import ToastNotifier
-                ToastNotifier().show_toast("AppFlow", message, duration=5)
-            except ImportError:
-                print(f"[NOTIFY] {message}")
+        command = _notification_command(message)
+        if command is not None:
+            subprocess.run(command, check=False)
+        else:
+            _show_toast(message)
+    except Exception:
+        print(f"[NOTIFY] {message}")
+
+
+async def send_notification_async(message: str) -> None:
+    """Like :func:`send_notification` but without blocking the event loop."""
+    try:
+        command = _notification_command(message)
+        if command is not None:
+            proc = await asyncio.create_subprocess_exec(*command)
+            await proc.wait()
         else:
-            print(f"[NOTIFY] {message}")
+            await asyncio.to_thread(_show_toast, message)
     except Exception:
         print(f"[NOTIFY] {message}")
 
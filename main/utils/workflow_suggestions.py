@@ -1,86 +1,626 @@
 from __future__ import annotations
 
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import pickle
 import re
-from collections import defaultdict
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
+from utils.event_log import is_structured, read_records
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy only speeds up the histograms; the results are the same without it
+    np = None
+
 
 LOG_PATH = Path(__file__).resolve().parent.parent / "appflow.log"
+PAIR_WINDOW = 300
+# Logs this large are parsed in parallel when nothing has been consumed yet
+PARALLEL_THRESHOLD = 256 * 1024 * 1024
+CHUNK_SIZE = 32 * 1024 * 1024
+
+# Upper bounds, in seconds, of the inter-launch interval buckets; longer
+# intervals fall into one last open bucket
+INTERVAL_EDGES = (60, 300, 900, 3600, 4 * 3600, 86400, 7 * 86400)
+WEEK_BINS = 7 * 24
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+_EPOCH = datetime(1970, 1, 1)
+_LAUNCH_PATTERN = re.compile(r"\[(.*?)\]\s+launch -> (.+)")
+
+
+def _parse_line(line: str, structured: bool = False) -> tuple[datetime, str] | None:
+    """Return (timestamp, app_name) if *line* records a launch."""
+    if structured:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+        if record.get("event") != "action" or record.get("action") != "launch":
+            return None
+        return datetime.fromtimestamp(record["ts"]), str(record["target"])
+    m = _LAUNCH_PATTERN.search(line)
+    if not m:
+        return None
+    try:
+        # fromisoformat parses "%Y-%m-%d %H:%M:%S" several times faster than strptime
+        return datetime.fromisoformat(m.group(1)), m.group(2).strip()
+    except ValueError:
+        return None
 
 
-def _parse_log(log_path: Path) -> list[tuple[datetime, str]]:
+def _parse_log(log_path: Path, since: datetime | None = None,
+               until: datetime | None = None) -> list[tuple[datetime, str]]:
     """Return a list of (timestamp, app_name) for launch events."""
     events: list[tuple[datetime, str]] = []
     if not log_path.exists():
         return events
-    pattern = re.compile(r"\[(.*?)\]\s+launch -> (.+)")
+    if is_structured(log_path):
+        records = read_records(
+            log_path,
+            since.timestamp() if since else None,
+            until.timestamp() if until else None,
+            event="action", action="launch",
+        )
+        return [(datetime.fromtimestamp(r["ts"]), str(r["target"])) for r in records]
     with open(log_path, "r", encoding="utf-8") as f:
         for line in f:
-            m = pattern.search(line)
-            if not m:
+            event = _parse_line(line)
+            if event is None:
                 continue
-            try:
-                ts = datetime.strptime(m.group(1), "%Y-%m-%d %H:%M:%S")
-                app = m.group(2).strip()
-                events.append((ts, app))
-            except ValueError:
+            ts = event[0]
+            if (since and ts < since) or (until and ts >= until):
                 continue
+            events.append(event)
     return events
 
 
-def _pair_counts(events: list[tuple[datetime, str]], window: int = 300) -> dict[tuple[str, str], int]:
+def _pair_counts(events: list[tuple[datetime, str]], window: int = PAIR_WINDOW) -> dict[tuple[str, str], int]:
     """Return counts of appA->appB launches within ``window`` seconds."""
-    counts: dict[tuple[str, str], int] = defaultdict(int)
-    for (ts_a, app_a), (ts_b, app_b) in zip(events, events[1:]):
-        if (ts_b - ts_a).total_seconds() <= window:
-            counts[(app_a, app_b)] += 1
-    return counts
+    miner = SequenceMiner(window, max_length=2)
+    for ts, app in events:
+        miner.add((ts - _EPOCH).total_seconds(), app)
+    return miner.pairs
 
 
 def _frequency_analysis(events: list[tuple[datetime, str]]) -> dict[str, dict]:
-    """Analyze app launch frequency by time of day."""
-    app_times = defaultdict(list)
-    for ts, app in events:
-        app_times[app].append(ts.hour)
-    
-    patterns = {}
-    for app, hours in app_times.items():
-        if len(hours) >= 3:  # At least 3 launches
-            most_common_hour = max(set(hours), key=hours.count)
-            patterns[app] = {
-                'most_common_hour': most_common_hour,
-                'frequency': hours.count(most_common_hour),
-                'total_launches': len(hours)
+    """Analyze app launch frequency by time of day, weekday and interval."""
+    return LaunchAggregates.from_columns(LaunchColumns.from_events(events)).frequency_patterns()
+
+
+def _interval_bucket(seconds: float) -> int:
+    return bisect.bisect_left(INTERVAL_EDGES, seconds)
+
+
+def _summarize(week: list[int], intervals: list[int]) -> dict:
+    """Describe one app's launch pattern from its weekday x hour histogram."""
+    hours = [sum(week[day * 24 + hour] for day in range(7)) for hour in range(24)]
+    frequency = max(hours)
+    most_common_hour = hours.index(frequency)
+    days = [sum(week[day * 24:(day + 1) * 24]) for day in range(7)]
+    pattern = {
+        'most_common_hour': most_common_hour,
+        'frequency': frequency,
+        'total_launches': sum(hours),
+        'most_common_weekday': days.index(max(days)),
+        'weekdays': [day for day in range(7) if week[day * 24 + most_common_hour]],
+        'typical_interval': None,
+    }
+    if any(intervals):
+        bucket = intervals.index(max(intervals))
+        # Lower bound of the most common gap between two launches
+        pattern['typical_interval'] = INTERVAL_EDGES[bucket - 1] if bucket else 0
+    return pattern
+
+
+class LaunchColumns:
+    """Launch events stored column-wise: app codes and local epoch seconds.
+
+    Seconds count from 1970-01-01 in local wall-clock time, so hour and
+    weekday follow from plain integer arithmetic.
+    """
+
+    def __init__(self):
+        self.apps: list[str] = []
+        self._codes: dict[str, int] = {}
+        self.codes = array("q")
+        self.seconds = array("d")
+
+    def __len__(self):
+        return len(self.codes)
+
+    def append(self, ts: datetime, app: str) -> None:
+        code = self._codes.get(app)
+        if code is None:
+            code = self._codes[app] = len(self.apps)
+            self.apps.append(app)
+        self.codes.append(code)
+        self.seconds.append((ts - _EPOCH).total_seconds())
+
+    @classmethod
+    def from_events(cls, events: list[tuple[datetime, str]]) -> "LaunchColumns":
+        columns = cls()
+        for ts, app in events:
+            columns.append(ts, app)
+        return columns
+
+    def extend(self, other: "LaunchColumns") -> None:
+        """Append the launches of *other*, re-coding its apps."""
+        mapping = []
+        for app in other.apps:
+            code = self._codes.get(app)
+            if code is None:
+                code = self._codes[app] = len(self.apps)
+                self.apps.append(app)
+            mapping.append(code)
+        self.codes.extend(array("q", (mapping[code] for code in other.codes)))
+        self.seconds.extend(other.seconds)
+
+
+def _histograms(columns: LaunchColumns) -> tuple[dict, dict, dict, dict]:
+    """Return per-app week and interval histograms and first/last launch seconds.
+
+    Intervals are taken between an app's launches in log order. NumPy's
+    ``bincount`` is used when available.
+    """
+    apps = columns.apps
+    width = len(INTERVAL_EDGES) + 1
+    week: dict[str, list[int]] = {}
+    intervals: dict[str, list[int]] = {}
+    first_seen: dict[str, float] = {}
+    last_seen: dict[str, float] = {}
+    if np is None:
+        for code, seconds in zip(columns.codes, columns.seconds):
+            app = apps[code]
+            previous = last_seen.get(app)
+            if previous is not None:
+                intervals.setdefault(app, [0] * width)[_interval_bucket(seconds - previous)] += 1
+            day, rest = divmod(int(seconds), 86400)
+            week.setdefault(app, [0] * WEEK_BINS)[(day + 3) % 7 * 24 + rest // 3600] += 1
+            first_seen.setdefault(app, seconds)
+            last_seen[app] = seconds
+        return week, intervals, first_seen, last_seen
+
+    n = len(apps)
+    codes = np.frombuffer(columns.codes, dtype=np.int64)
+    seconds = np.frombuffer(columns.seconds, dtype=np.float64)
+
+    day, rest = np.divmod(seconds.astype(np.int64), 86400)
+    slots = codes * WEEK_BINS + (day + 3) % 7 * 24 + rest // 3600
+    week_bins = np.bincount(slots, minlength=n * WEEK_BINS).reshape(n, WEEK_BINS)
+
+    # Group launches by app, keeping log order within each app
+    order = np.argsort(codes, kind="stable")
+    sorted_codes, sorted_seconds = codes[order], seconds[order]
+    same = sorted_codes[1:] == sorted_codes[:-1]
+    buckets = np.searchsorted(INTERVAL_EDGES, np.diff(sorted_seconds)[same], side="left")
+    interval_bins = np.bincount(
+        sorted_codes[1:][same] * width + buckets, minlength=n * width
+    ).reshape(n, width)
+
+    starts = np.flatnonzero(np.r_[True, ~same])
+    ends = np.r_[starts[1:] - 1, len(order) - 1]
+    for code, first, last in zip(sorted_codes[starts].tolist(), sorted_seconds[starts].tolist(),
+                                 sorted_seconds[ends].tolist()):
+        app = apps[code]
+        week[app] = week_bins[code].tolist()
+        if interval_bins[code].any():
+            intervals[app] = interval_bins[code].tolist()
+        first_seen[app] = first
+        last_seen[app] = last
+    return week, intervals, first_seen, last_seen
+
+
+class SequenceMiner:
+    """Counts ordered app sequences launched within a sliding time window.
+
+    The window is a deque of recent launches: each new launch enters on the
+    right and launches more than ``window`` seconds older leave on the left.
+    Each sequence is counted at most once per anchor (its first launch), so
+    the support of ``A -> B`` never exceeds the number of launches of ``A``.
+    Apps may repeat: ``A -> A`` is an app relaunched within the window.
+
+    Pairs are counted exactly. A launch of ``B`` completes ``A -> B`` for
+    every launch in the window from the previous ``B`` on, as the earlier
+    ones already counted it, so the work per launch is bounded by the
+    launches since that app last ran rather than by the whole window.
+
+    Longer sequences, up to ``max_length`` apps, are only anchored at the
+    last ``max_anchors`` launches of the window, which bounds the work per
+    launch on dense logs. They use lossy counting: every ``prune_interval``
+    launches the sequences that have not averaged one occurrence per
+    interval since they were first seen are dropped. Memory stays bounded
+    on large logs, and a kept count is low by at most
+    ``launches / prune_interval``.
+    """
+
+    def __init__(self, window: int = PAIR_WINDOW, max_length: int = 3,
+                 prune_interval: int = 10_000, max_anchors: int = 8):
+        self.window = window
+        self.max_length = max_length
+        self.prune_interval = prune_interval
+        self.max_anchors = max_anchors
+        self.launches = 0
+        self.pairs: dict[tuple[str, str], int] = {}
+        # Sequence -> [count, maximum count missed before it was tracked]
+        self.sequences: dict[tuple[str, ...], list[int]] = {}
+        # (seconds, launch number, app) of every launch in the window
+        self._recent: deque[tuple[float, int, str]] = deque()
+        # App -> launch number of its last launch still in the window
+        self._last: dict[str, int] = {}
+        # (seconds, open prefixes, sequences counted) of the newest anchors
+        self._anchors: deque[tuple[float, list, set]] = deque(maxlen=max_anchors)
+
+    def add(self, seconds: float, app: str) -> None:
+        recent = self._recent
+        last = self._last
+        while recent and seconds - recent[0][0] > self.window:
+            _, number, expired = recent.popleft()
+            if last.get(expired) == number:
+                del last[expired]
+
+        pairs = self.pairs
+        previous = last.get(app, -1)
+        for _, number, other in reversed(recent):
+            if number < previous:
+                break
+            pair = (other, app)
+            pairs[pair] = pairs.get(pair, 0) + 1
+        number = self.launches
+        recent.append((seconds, number, app))
+        last[app] = number
+
+        if self.max_length > 2:
+            self._extend_sequences(seconds, app)
+
+        self.launches += 1
+        if self.launches % self.prune_interval == 0:
+            bucket = self.launches // self.prune_interval
+            self.sequences = {
+                seq: entry for seq, entry in self.sequences.items() if sum(entry) > bucket
             }
-    return patterns
 
+    def _extend_sequences(self, seconds: float, app: str) -> None:
+        anchors = self._anchors
+        while anchors and seconds - anchors[0][0] > self.window:
+            anchors.popleft()
+
+        bucket = self.launches // self.prune_interval
+        for _, prefixes, counted in anchors:
+            # Prefixes opened by this launch are not extended by it again
+            for prefix in prefixes[:]:
+                extended = prefix + (app,)
+                if extended in counted:
+                    continue
+                counted.add(extended)
+                if len(extended) < self.max_length:
+                    prefixes.append(extended)
+                if len(extended) < 3:
+                    continue
+                if extended in self.sequences:
+                    self.sequences[extended][0] += 1
+                else:
+                    self.sequences[extended] = [1, bucket]
+        anchors.append((seconds, [(app,)], set()))
+
+    def counts(self, min_support: int = 1) -> dict[tuple[str, ...], int]:
+        """Return every pair and sequence seen at least *min_support* times."""
+        counts = {pair: count for pair, count in self.pairs.items() if count >= min_support}
+        counts.update(
+            (seq, entry[0]) for seq, entry in self.sequences.items() if entry[0] >= min_support
+        )
+        return counts
+
+
+class LaunchAggregates:
+    """Launch statistics accumulated from a log file.
+
+    Per app it keeps a weekday x hour histogram (``week``, 168 bins) and a
+    histogram of the gaps between consecutive launches (``intervals``, one
+    bin per :data:`INTERVAL_EDGES` plus an open one). ``miner`` counts the
+    app sequences launched within :data:`PAIR_WINDOW` of each other.
 
-def generate_suggestions(log_path: Path | None = None, min_count: int = 2) -> list[str]:
-    """Analyze logs and return suggestion strings."""
+    ``offset`` is the byte position up to which the log has been consumed,
+    and ``device``/``inode``/``size`` identify the file it was read from.
+    :meth:`consume` reads only what was appended since; when the log was
+    rotated (different inode, or shorter than the offset) it starts again
+    from the top of the new file and adds to the existing totals.
+    """
+
+    VERSION = 4
+
+    def __init__(self, window: int = PAIR_WINDOW, max_length: int = 3):
+        self.version = self.VERSION
+        self.offset = 0
+        self.device: int | None = None
+        self.inode: int | None = None
+        self.size = 0
+        self.week: dict[str, list[int]] = {}
+        self.intervals: dict[str, list[int]] = {}
+        self.first_seen: dict[str, float] = {}
+        self.last_seen: dict[str, float] = {}
+        self.miner = SequenceMiner(window, max_length)
+
+    @property
+    def pairs(self) -> dict[tuple[str, str], int]:
+        return self.miner.pairs
+
+    @classmethod
+    def from_columns(cls, columns: LaunchColumns, window: int = PAIR_WINDOW,
+                     max_length: int = 3) -> "LaunchAggregates":
+        aggregates = cls(window, max_length)
+        aggregates.extend(columns)
+        return aggregates
+
+    def extend(self, columns: LaunchColumns) -> None:
+        """Add the launches in *columns*, which follow everything seen so far."""
+        if not len(columns):
+            return
+        week, intervals, first_seen, last_seen = _histograms(columns)
+
+        width = len(INTERVAL_EDGES) + 1
+        for app, first in first_seen.items():
+            bins = intervals.get(app)
+            previous = self.last_seen.get(app)
+            if previous is not None:
+                # The gap from this app's last launch in earlier data
+                bins = list(bins) if bins else [0] * width
+                bins[_interval_bucket(first - previous)] += 1
+            if bins:
+                totals = self.intervals.setdefault(app, [0] * width)
+                for bucket, count in enumerate(bins):
+                    totals[bucket] += count
+            self.first_seen.setdefault(app, first)
+        for app, counts in week.items():
+            totals = self.week.setdefault(app, [0] * WEEK_BINS)
+            for slot, count in enumerate(counts):
+                totals[slot] += count
+        self.last_seen.update(last_seen)
+
+        apps = columns.apps
+        for code, seconds in zip(columns.codes, columns.seconds):
+            self.miner.add(seconds, apps[code])
+
+    def consume(self, log_path: Path) -> int:
+        """Add the launches appended to *log_path* since the last call.
+
+        Returns the number of launches added. A trailing line without a
+        newline is left for the next call.
+        """
+        try:
+            st = os.stat(log_path)
+        except FileNotFoundError:
+            return 0
+        if (st.st_dev, st.st_ino) != (self.device, self.inode) or st.st_size < self.offset:
+            self.offset = 0
+        self.device, self.inode = st.st_dev, st.st_ino
+        if st.st_size == self.offset:
+            self.size = st.st_size
+            return 0
+
+        with open(log_path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        structured = is_structured(log_path)
+        columns = LaunchColumns()
+        for line in data[:end].decode("utf-8", errors="replace").splitlines():
+            event = _parse_line(line, structured)
+            if event is not None:
+                columns.append(*event)
+        self.extend(columns)
+        self.offset += end
+        self.size = st.st_size
+        return len(columns)
+
+    def launches(self, app: str) -> int:
+        return sum(self.week.get(app, ()))
+
+    def ranked_sequences(self, min_support: int = 2, min_confidence: float = 0.0
+                         ) -> list[tuple[tuple[str, ...], int, float]]:
+        """Return ``(sequence, support, confidence)`` ranked best first.
+
+        Confidence is the share of launches of the sequence's first app
+        that were followed by the rest of it within the window.
+        """
+        ranked = []
+        for sequence, support in self.miner.counts(min_support).items():
+            confidence = support / max(self.launches(sequence[0]), 1)
+            if confidence >= min_confidence:
+                ranked.append((sequence, support, confidence))
+        ranked.sort(key=lambda item: (-item[2], -item[1], len(item[0])))
+        return ranked
+
+    def frequency_patterns(self, min_launches: int = 3) -> dict[str, dict]:
+        """Return the launch pattern of every app launched at least *min_launches* times."""
+        width = len(INTERVAL_EDGES) + 1
+        patterns = {}
+        for app, week in self.week.items():
+            if sum(week) >= min_launches:
+                patterns[app] = _summarize(week, self.intervals.get(app, [0] * width))
+        return patterns
+
+
+class AggregateStore:
+    """Persists :class:`LaunchAggregates` per log file between runs."""
+
+    def __init__(self, cache_dir: Path | None = None):
+        if cache_dir is None:
+            env_dir = os.getenv("APPFLOW_CACHE_DIR")
+            cache_dir = Path(env_dir) if env_dir else Path.home() / ".cache" / "appflow"
+        self.cache_dir = Path(cache_dir) / "suggestions"
+
+    def _entry_path(self, log_path: Path) -> Path:
+        key = hashlib.sha1(os.fsencode(Path(log_path).resolve())).hexdigest()
+        return self.cache_dir / f"{key}.pickle"
+
+    def load(self, log_path: Path) -> LaunchAggregates:
+        try:
+            with open(self._entry_path(log_path), "rb") as f:
+                aggregates = pickle.load(f)
+        except Exception:
+            return LaunchAggregates()
+        if getattr(aggregates, "version", None) != LaunchAggregates.VERSION:
+            return LaunchAggregates()
+        return aggregates
+
+    def save(self, log_path: Path, aggregates: LaunchAggregates) -> None:
+        entry_path = self._entry_path(log_path)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump(aggregates, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry_path)
+        except OSError:
+            # Without a writable cache every run starts from scratch
+            pass
+
+
+aggregate_store = AggregateStore()
+
+
+def _parse_chunk(log_path: Path, start: int, end: int, structured: bool) -> LaunchColumns:
+    """Return the launches in bytes ``[start, end)`` of *log_path*."""
+    token = b'"launch"' if structured else b"launch -> "
+    columns = LaunchColumns()
+    with open(log_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = mm.find(token, start, end)
+        while pos != -1:
+            line_start = mm.rfind(b"\n", start, pos) + 1 or start
+            line_end = mm.find(b"\n", pos, end)
+            if line_end == -1:
+                line_end = end
+            event = _parse_line(mm[line_start:line_end].decode("utf-8", errors="replace"), structured)
+            if event is not None:
+                columns.append(*event)
+            pos = mm.find(token, line_end, end)
+    return columns
+
+
+def _chunk_bounds(log_path: Path, size: int, chunk_size: int) -> list[tuple[int, int]]:
+    """Split the complete lines of *log_path* into newline-aligned ranges."""
+    bounds = []
+    with open(log_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        end_of_lines = mm.rfind(b"\n", 0, size) + 1
+        start = 0
+        while start < end_of_lines:
+            end = mm.find(b"\n", min(start + chunk_size, end_of_lines) - 1, end_of_lines) + 1
+            if end == 0:
+                end = end_of_lines
+            bounds.append((start, end))
+            start = end
+    return bounds
+
+
+def parse_log_parallel(log_path: Path, workers: int | None = None,
+                       chunk_size: int = CHUNK_SIZE) -> LaunchAggregates:
+    """Build the launch aggregates of a large log using several processes.
+
+    The file is memory-mapped and split into newline-aligned chunks; each
+    worker scans its chunk for launch lines only and returns them as
+    columns. The columns are joined in file order and aggregated once, so
+    sequences straddling a chunk boundary are counted as in a serial read.
+    The result can be saved to an
+    :class:`AggregateStore` and resumed with :meth:`LaunchAggregates.consume`.
+    """
+    log_path = Path(log_path)
+    aggregates = LaunchAggregates()
+    st = os.stat(log_path)
+    aggregates.device, aggregates.inode, aggregates.size = st.st_dev, st.st_ino, st.st_size
+    if st.st_size == 0:
+        return aggregates
+
+    bounds = _chunk_bounds(log_path, st.st_size, chunk_size)
+    structured = is_structured(log_path)
+    args = [(log_path, start, end, structured) for start, end in bounds]
+    if len(bounds) <= 1 or workers == 1:
+        results = [_parse_chunk(*arg) for arg in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_parse_chunk, *zip(*args)))
+
+    columns = LaunchColumns()
+    for partial in results:
+        columns.extend(partial)
+    aggregates.extend(columns)
+    aggregates.offset = bounds[-1][1] if bounds else 0
+    return aggregates
+
+
+def _size(path: Path) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def load_aggregates(log_path: Path, store: AggregateStore | None = aggregate_store) -> LaunchAggregates:
+    """Return the launch aggregates of *log_path*, brought up to date.
+
+    With a *store* only the part of the log appended since the previous
+    call is read; without one the whole log is scanned.
+    """
+    log_path = Path(log_path)
+    aggregates = store.load(log_path) if store is not None else LaunchAggregates()
+    if aggregates.offset == 0 and not aggregates.week and _size(log_path) >= PARALLEL_THRESHOLD:
+        aggregates = parse_log_parallel(log_path)
+    aggregates.consume(log_path)
+    if store is not None:
+        store.save(log_path, aggregates)
+    return aggregates
+
+
+def generate_suggestions(log_path: Path | None = None, min_count: int = 2,
+                         store: AggregateStore | None = aggregate_store,
+                         min_confidence: float = 0.0) -> list[str]:
+    """Analyze logs and return suggestion strings.
+
+    Workflow suggestions need ``min_count`` occurrences, and
+    ``min_confidence`` if given, and are ranked by confidence, then support.
+    """
     if log_path is None:
         log_path = LOG_PATH
     
-    events = _parse_log(Path(log_path))
-    if not events:
+    aggregates = load_aggregates(Path(log_path), store)
+    if not aggregates.week:
         return []
     
     suggestions: list[str] = []
     
     # Sequential app suggestions
-    counts = _pair_counts(events)
-    for (app_a, app_b), cnt in counts.items():
-        if cnt >= min_count:
+    for sequence, cnt, confidence in aggregates.ranked_sequences(min_count, min_confidence):
+        if len(sequence) == 2:
+            app_a, app_b = sequence
+            suggestions.append(
+                f"When '{app_a}' starts, consider launching '{app_b}' automatically "
+                f"(seen {cnt} times, {confidence:.0%} of its launches)"
+            )
+        else:
+            workflow = " -> ".join(f"'{app}'" for app in sequence)
             suggestions.append(
-                f"When '{app_a}' starts, consider launching '{app_b}' automatically (seen {cnt} times)"
+                f"{workflow} are often launched together (seen {cnt} times, "
+                f"{confidence:.0%} of '{sequence[0]}' launches)"
             )
     
     # Time-based suggestions
-    patterns = _frequency_analysis(events)
+    patterns = aggregates.frequency_patterns()
     for app, data in patterns.items():
         if data['frequency'] >= min_count:
+            days = ""
+            if len(data['weekdays']) < 7:
+                days = " on " + ", ".join(WEEKDAYS[day] for day in data['weekdays'])
             suggestions.append(
-                f"'{app}' is frequently launched at {data['most_common_hour']:02d}:00 "
+                f"'{app}' is frequently launched at {data['most_common_hour']:02d}:00{days} "
                 f"({data['frequency']}/{data['total_launches']} times)"
             )
     
@@ -98,8 +638,30 @@ def generate_suggestions(log_path: Path | None = None, min_count: int = 2) -> li
     return suggestions
 
 
-def generate_rule_template(app_a: str, app_b: str) -> dict:
-    """Generate a YAML rule template for sequential app launches."""
+def generate_rule_template(app_a: str, app_b: str | None = None,
+                           pattern: dict | None = None) -> dict:
+    """Generate a YAML rule template from a launch pattern.
+
+    With *app_b* the rule launches it after *app_a* starts; *pattern* (from
+    :meth:`LaunchAggregates.frequency_patterns` for *app_a*) then raises the
+    cooldown to the usual gap between two launches of *app_a*. Without
+    *app_b* the rule launches *app_a* at its most common hour.
+    """
+    if app_b is None:
+        hour = pattern['most_common_hour'] if pattern else 9
+        return {
+            'name': f'Launch {app_a} at {hour:02d}:00',
+            'triggers': [{'at_time': f'{hour:02d}:00'}],
+            'actions': [
+                {'launch': app_a},
+                {'notify': f'{app_a} launched automatically'}
+            ],
+            'enabled': True
+        }
+
+    cooldown = 300  # 5 minutes cooldown
+    if pattern and pattern.get('typical_interval'):
+        cooldown = max(cooldown, pattern['typical_interval'])
     return {
         'name': f'Auto-launch {app_b} after {app_a}',
         'triggers': [{'app_start': app_a}],
@@ -108,7 +670,7 @@ def generate_rule_template(app_a: str, app_b: str) -> dict:
             {'launch': app_b},
             {'notify': f'{app_b} launched automatically'}
         ],
-        'cooldown': 300,  # 5 minutes cooldown
+        'cooldown': cooldown,
         'enabled': True
     }
 